@@ -1,42 +1,35 @@
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
-from sklearn.metrics import silhouette_score
+from scipy.sparse import load_npz
 import matplotlib.pyplot as plt
 import seaborn as sns
+from models.clustering import fit_clusters, save_clusters
 
-# 1. Load dataset
-df = pd.read_csv("data/raw/netflix_titles.csv")
-df = df.dropna(subset=["description"])
+# 1. Load the processed dataset and its sparse TF-IDF matrix (never densified)
+df = pd.read_csv("data/processed/processed_netflix_titles.csv")
+X = load_npz("data/processed/tfidf_matrix.npz").tocsr()
 
-# 2. Text feature extraction
-tfidf = TfidfVectorizer(stop_words="english", max_features=5000)
-X = tfidf.fit_transform(df["description"])
+# 2. TruncatedSVD + MiniBatchKMeans clustering
+k = 20  # also the coarse partition the recommender probes for large catalogs
+clusters = fit_clusters(X, n_clusters=k)
+df["cluster"] = clusters["labels"]
 
-# 3. Apply KMeans clustering
-k = 5  # or tune this later
-model = KMeans(n_clusters=k, random_state=42)
-labels = model.fit_predict(X)
+# 3. Evaluate clustering on a sample of rows
+print(f"Silhouette Score (sampled): {clusters['silhouette']:.3f}")
 
-df["cluster"] = labels
+# 4. Save labels and centroids for the recommender
+save_clusters(clusters)
+print("Saved cluster labels and centroids to data/processed/clusters.npz")
 
-# 4. Evaluate clustering
-sil_score = silhouette_score(X, labels)
-print(f"Silhouette Score: {sil_score:.3f}")
-
-# 5. Use PCA to reduce to 2D for plotting
-pca = PCA(n_components=2)
-X_pca = pca.fit_transform(X.toarray())
-df["pca_1"] = X_pca[:, 0]
-df["pca_2"] = X_pca[:, 1]
+# 5. The first two SVD components give the 2D projection for plotting
+df["svd_1"] = clusters["embedding"][:, 0]
+df["svd_2"] = clusters["embedding"][:, 1]
 
 # 6. Plot the clusters
 plt.figure(figsize=(10, 6))
-sns.scatterplot(x="pca_1", y="pca_2", hue="cluster", data=df, palette="Set2")
-plt.title("KMeans Clustering of Netflix Titles Based on Description")
-plt.xlabel("PCA Component 1")
-plt.ylabel("PCA Component 2")
+sns.scatterplot(x="svd_1", y="svd_2", hue="cluster", data=df, palette="Set2")
+plt.title("KMeans Clustering of Netflix Titles Based on Content")
+plt.xlabel("SVD Component 1")
+plt.ylabel("SVD Component 2")
 plt.legend(title="Cluster")
 plt.tight_layout()
 plt.savefig("cluster_plot.png")
@@ -0,0 +1,164 @@
+"""
+Per-request overhead of the webhook's request validation and response serialization.
+
+The recommender is replaced by a fixed answer, so only the work around it is
+timed: the legacy handler (generic DialogflowRequest body, parameters unwrapped
+by hand, response dict through FastAPI's default encoder) against the current
+one (body validated from bytes, typed per-intent parameters, precompiled
+response template).
+
+Usage (from the repository root):
+    python -m benchmarks.overhead_bench --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, List, Any, Callable
+from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
+from benchmarks.payloads import load_catalog_vocabulary, generate_payloads
+from benchmarks.stats import summarize
+from models.schemas import DialogflowRequest, INTENT_PARAMETERS, parse_parameters
+from utils.formatter import format_recommendations
+from utils.fast_json import FulfillmentResponse, read_model, render_fulfillment, orjson
+from utils.singleflight import make_key
+
+# Stands in for the recommender: a typical five-title answer
+STUB_ANSWER = format_recommendations([
+    {"title": "Pokémon the Movie: I Choose You!", "release_year": 2017},
+    {"title": "Amélie", "release_year": 2001},
+    {"title": "The Irishman", "release_year": 2019},
+    {"title": "Dick Johnson Is Dead", "release_year": 2020},
+    {"title": "Stranger Things", "release_year": 2016},
+], "Similar to 'Stranger Things'")
+
+
+def stub_answer(intent: str, parameters: Any) -> str:
+    return STUB_ANSWER
+
+
+def legacy_parameters(intent: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """What every legacy processor did by hand: unwrap lists and stringify"""
+    values = {}
+    model = INTENT_PARAMETERS.get(intent)
+    for name in (model.model_fields if model is not None else ()):
+        value = parameters.get(name)
+        if isinstance(value, list):
+            value = value[0] if value else ""
+        values[name] = str(value) if value else None
+    return values
+
+
+def legacy_handle(body: bytes) -> bytes:
+    """The legacy path without the ASGI layer, encoded the way FastAPI's JSONResponse does"""
+    request = DialogflowRequest.model_validate(json.loads(body))
+    intent = request.queryResult.intent.displayName
+    parameters = request.queryResult.parameters
+    make_key(intent, parameters)
+    response_text = stub_answer(intent, legacy_parameters(intent, parameters))
+    content = jsonable_encoder({
+        "fulfillmentText": response_text,
+        "fulfillmentMessages": [{"text": {"text": [response_text]}}],
+    })
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def lean_handle(body: bytes) -> bytes:
+    """The current path without the ASGI layer"""
+    request = DialogflowRequest.model_validate_json(body)
+    intent = request.queryResult.intent.displayName
+    params = parse_parameters(intent, request.queryResult.parameters)
+    make_key(intent, params.model_dump(exclude_none=True) if params is not None else {})
+    return render_fulfillment(stub_answer(intent, params))
+
+
+def legacy_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/webhook")
+    async def webhook(request: DialogflowRequest):
+        intent = request.queryResult.intent.displayName
+        parameters = request.queryResult.parameters
+        make_key(intent, parameters)
+        response_text = stub_answer(intent, legacy_parameters(intent, parameters))
+        return {
+            "fulfillmentText": response_text,
+            "fulfillmentMessages": [{"text": {"text": [response_text]}}],
+        }
+
+    return app
+
+
+def lean_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/webhook", response_class=FulfillmentResponse)
+    async def webhook(request: Request):
+        webhook_request = await read_model(request, DialogflowRequest)
+        intent = webhook_request.queryResult.intent.displayName
+        params = parse_parameters(intent, webhook_request.queryResult.parameters)
+        make_key(intent, params.model_dump(exclude_none=True) if params is not None else {})
+        return FulfillmentResponse(stub_answer(intent, params))
+
+    return app
+
+
+def time_handler(handle: Callable[[bytes], bytes], bodies: List[bytes], warmup: int = 100) -> Dict[str, Any]:
+    for body in bodies[:warmup]:
+        handle(body)
+    latencies = []
+    for body in bodies:
+        start = time.perf_counter()
+        handle(body)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+async def time_app(app: FastAPI, payloads: List[Dict[str, Any]], warmup: int = 100) -> Dict[str, Any]:
+    from benchmarks.webhook_bench import bench_in_process
+    await bench_in_process(app, payloads[:warmup], concurrency=1)
+    return await bench_in_process(app, payloads, concurrency=1)
+
+
+def run_overhead_benchmarks(payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+    bodies = [json.dumps(payload).encode("utf-8") for payload in payloads]
+    # Both paths must answer with the same JSON document
+    assert json.loads(legacy_handle(bodies[0])) == json.loads(lean_handle(bodies[0]))
+
+    return {
+        "encoder": "orjson" if orjson is not None else "json",
+        "handler": {"legacy": time_handler(legacy_handle, bodies), "lean": time_handler(lean_handle, bodies)},
+        "asgi": {
+            "legacy": asyncio.run(time_app(legacy_app(), payloads))["latency"],
+            "lean": asyncio.run(time_app(lean_app(), payloads))["latency"],
+        },
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Webhook validation and serialization overhead")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Optional path for the JSON report")
+    args = parser.parse_args(argv)
+
+    payloads = generate_payloads(load_catalog_vocabulary(), args.requests, seed=args.seed)
+    report = run_overhead_benchmarks(payloads)
+
+    print(f"encoder: {report['encoder']}")
+    for level in ("handler", "asgi"):
+        legacy, lean = report[level]["legacy"], report[level]["lean"]
+        print(f"{level:<8} legacy mean={legacy['mean_ms'] * 1000:.1f}us p50={legacy['p50_ms'] * 1000:.1f}us  "
+              f"lean mean={lean['mean_ms'] * 1000:.1f}us p50={lean['p50_ms'] * 1000:.1f}us  "
+              f"saved={(legacy['mean_ms'] - lean['mean_ms']) * 1000:.1f}us/request")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
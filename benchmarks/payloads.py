@@ -0,0 +1,115 @@
+import random
+import pandas as pd
+from typing import Dict, List, Any, Callable, Optional
+
+PROCESSED_CSV = './data/processed/processed_netflix_titles.csv'
+
+# Placeholder values written by data_preprocessing.load_and_clean_data
+MISSING_VALUES = {'unknown director', 'unknown cast', 'unknown country', 'not rated'}
+
+TEXT_TEMPLATES = [
+    "I want to watch something with {actor}",
+    "Can you suggest something similar to {title}?",
+    "Any good movies directed by {director}?",
+    "Show me some {genre}",
+    "Recommend something like {title} with {actor}",
+]
+
+
+def _split_values(series: pd.Series, sep: str = ',') -> List[str]:
+    """Flatten a comma separated column into its distinct, non-placeholder values"""
+    values = set()
+    for cell in series.dropna():
+        for value in str(cell).split(sep):
+            value = value.strip()
+            if value and value.lower() not in MISSING_VALUES:
+                values.add(value)
+    return sorted(values)
+
+
+def load_catalog_vocabulary(df: Optional[pd.DataFrame] = None,
+                            csv_path: str = PROCESSED_CSV) -> Dict[str, List[str]]:
+    """Collect the titles, people, genres, ratings and countries used to build payloads"""
+    if df is None:
+        df = pd.read_csv(csv_path)
+
+    return {
+        "title": sorted(set(df['title'].dropna().astype(str))),
+        "actor": _split_values(df['cast']),
+        "director": _split_values(df['director']),
+        "genre": _split_values(df['listed_in']),
+        "rating": _split_values(df['rating']),
+        "country": _split_values(df['country']),
+    }
+
+
+def _similar_content_parameters(vocab: Dict[str, List[str]], rng: random.Random) -> Dict[str, Any]:
+    return {"title": rng.choice(vocab["title"])}
+
+def _director_parameters(vocab: Dict[str, List[str]], rng: random.Random) -> Dict[str, Any]:
+    return {"director_name": rng.choice(vocab["director"])}
+
+def _actor_parameters(vocab: Dict[str, List[str]], rng: random.Random) -> Dict[str, Any]:
+    return {"cast_name": rng.choice(vocab["actor"])}
+
+def _genre_parameters(vocab: Dict[str, List[str]], rng: random.Random) -> Dict[str, Any]:
+    return {"genre": rng.choice(vocab["genre"])}
+
+def _rating_parameters(vocab: Dict[str, List[str]], rng: random.Random) -> Dict[str, Any]:
+    return {"rating": rng.choice(vocab["rating"])}
+
+def _multi_parameters(vocab: Dict[str, List[str]], rng: random.Random) -> Dict[str, Any]:
+    # Dialogflow sends every slot of the intent, unfilled ones as empty strings
+    parameters = {"genre": "", "director": "", "actor": "", "rating": "", "country": ""}
+    for slot in rng.sample(sorted(parameters), k=2):
+        parameters[slot] = rng.choice(vocab[slot])
+    return parameters
+
+def _text_parameters(vocab: Dict[str, List[str]], rng: random.Random) -> Dict[str, Any]:
+    template = rng.choice(TEXT_TEMPLATES)
+    return {"text": template.format(
+        actor=rng.choice(vocab["actor"]),
+        title=rng.choice(vocab["title"]),
+        director=rng.choice(vocab["director"]),
+        genre=rng.choice(vocab["genre"]),
+    )}
+
+
+PARAMETER_BUILDERS: Dict[str, Callable[[Dict[str, List[str]], random.Random], Dict[str, Any]]] = {
+    "recommend_similar_content": _similar_content_parameters,
+    "recommend_by_director": _director_parameters,
+    "recommend_by_actor": _actor_parameters,
+    "recommend_by_genre": _genre_parameters,
+    "recommend_by_rating": _rating_parameters,
+    "recommend_by_multi": _multi_parameters,
+    "recommend_by_text": _text_parameters,
+}
+
+
+def build_payload(intent: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap intent parameters in the Dialogflow ES webhook request shape"""
+    return {
+        "queryResult": {
+            "intent": {"displayName": intent},
+            "parameters": parameters
+        }
+    }
+
+
+def generate_payloads(vocab: Dict[str, List[str]],
+                      n_payloads: int,
+                      intents: Optional[List[str]] = None,
+                      seed: int = 42) -> List[Dict[str, Any]]:
+    """Generate webhook payloads, cycling through the intents so each one gets an equal share"""
+    rng = random.Random(seed)
+    intents = intents or list(PARAMETER_BUILDERS)
+
+    unknown = [intent for intent in intents if intent not in PARAMETER_BUILDERS]
+    if unknown:
+        raise ValueError(f"No payload builder for intents: {', '.join(unknown)}")
+
+    payloads = []
+    for i in range(n_payloads):
+        intent = intents[i % len(intents)]
+        payloads.append(build_payload(intent, PARAMETER_BUILDERS[intent](vocab, rng)))
+    return payloads
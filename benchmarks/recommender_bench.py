@@ -0,0 +1,55 @@
+import contextlib
+import io
+import random
+import time
+from typing import Dict, List, Any, Callable, Tuple
+from benchmarks.payloads import TEXT_TEMPLATES
+from benchmarks.stats import summarize
+
+
+def _method_calls(vocab: Dict[str, List[str]], rng: random.Random) -> Dict[str, Callable[[], Tuple[tuple, dict]]]:
+    """Argument factories for every NetflixRecommender.recommend_* method"""
+    return {
+        "recommend_similar_content": lambda: ((rng.choice(vocab["title"]),), {}),
+        "recommend_by_director": lambda: ((rng.choice(vocab["director"]),), {}),
+        "recommend_by_actor": lambda: ((rng.choice(vocab["actor"]),), {}),
+        "recommend_by_rating": lambda: ((rng.choice(vocab["rating"]),), {}),
+        "recommend_by_genre": lambda: ((rng.choice(vocab["genre"]),), {}),
+        "recommend_by_multi": lambda: ((), {
+            "genre": rng.choice(vocab["genre"]),
+            "country": rng.choice(vocab["country"]),
+        }),
+        "recommend_by_ner": lambda: ((rng.choice(TEXT_TEMPLATES).format(
+            actor=rng.choice(vocab["actor"]),
+            title=rng.choice(vocab["title"]),
+            director=rng.choice(vocab["director"]),
+            genre=rng.choice(vocab["genre"]),
+        ),), {}),
+    }
+
+
+def run_microbenchmarks(recommender,
+                        vocab: Dict[str, List[str]],
+                        iterations: int = 50,
+                        warmup: int = 3,
+                        seed: int = 42) -> Dict[str, Dict[str, Any]]:
+    """Time each recommend_* method on catalog-derived arguments"""
+    rng = random.Random(seed)
+    results = {}
+
+    for method_name, make_args in _method_calls(vocab, rng).items():
+        method = getattr(recommender, method_name)
+        calls = [make_args() for _ in range(warmup + iterations)]
+        latencies = []
+
+        # The recommender prints debug output on every call; keep it out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i, (args, kwargs) in enumerate(calls):
+                start = time.perf_counter()
+                method(*args, **kwargs)
+                if i >= warmup:
+                    latencies.append(time.perf_counter() - start)
+
+        results[method_name] = summarize(latencies)
+
+    return results
@@ -0,0 +1,153 @@
+"""
+Replay recorded webhook traffic against a local app.
+
+Record with TRAFFIC_RECORD_DIR=./data/traffic, then (from the repository root):
+    python -m benchmarks.replay ./data/traffic --speed 1        # original pacing
+    python -m benchmarks.replay ./data/traffic --speed 10 --mode uvicorn
+    python -m benchmarks.replay ./data/traffic --rate 200       # fixed requests per second
+    python -m benchmarks.replay ./data/traffic --speed 0 --concurrency 32   # as fast as possible
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import httpx
+from collections import defaultdict
+from typing import Dict, List, Any, Optional, Tuple
+from benchmarks.stats import summarize
+from utils.traffic import load_recorded
+
+
+def schedule(records: List[Tuple[float, Dict[str, Any]]],
+             speed: float = 1.0,
+             rate: Optional[float] = None) -> List[float]:
+    """Send offsets in seconds: a fixed `rate`, or the recorded gaps divided by `speed`"""
+    if rate:
+        return [i / rate for i in range(len(records))]
+    if not records:
+        return []
+    start = records[0][0]
+    return [(ts - start) / speed for ts, _ in records]
+
+
+async def replay(client: httpx.AsyncClient,
+                 records: List[Tuple[float, Dict[str, Any]]],
+                 speed: float = 1.0,
+                 rate: Optional[float] = None,
+                 max_in_flight: int = 256) -> Dict[str, Any]:
+    """
+    Open-loop replay: requests go out on schedule whether or not earlier ones
+    have finished, up to `max_in_flight`. `lag` reports how far sends fell
+    behind the schedule, which means the client or the app could not keep up.
+    """
+    offsets = schedule(records, speed, rate)
+    in_flight = asyncio.Semaphore(max_in_flight)
+    latencies = []
+    per_intent = defaultdict(list)
+    lags = []
+    errors = 0
+
+    async def send(payload: Dict[str, Any]):
+        nonlocal errors
+        try:
+            start = time.perf_counter()
+            response = await client.post("/webhook", json=payload)
+            elapsed = time.perf_counter() - start
+            if response.status_code != 200:
+                errors += 1
+                return
+        except httpx.HTTPError:
+            errors += 1
+            return
+        finally:
+            in_flight.release()
+        latencies.append(elapsed)
+        per_intent[payload["queryResult"]["intent"]["displayName"]].append(elapsed)
+
+    started = time.perf_counter()
+    tasks = []
+    for offset, (_, payload) in zip(offsets, records):
+        delay = offset - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await in_flight.acquire()
+        lags.append(max(time.perf_counter() - started - offset, 0.0))
+        tasks.append(asyncio.ensure_future(send(payload)))
+    await asyncio.gather(*tasks)
+    wall_time = time.perf_counter() - started
+
+    return {
+        "requests": len(records),
+        "errors": errors,
+        "wall_time_s": round(wall_time, 3),
+        "throughput_rps": round(len(latencies) / wall_time, 2) if wall_time else 0.0,
+        "latency": summarize(latencies),
+        "lag": summarize(lags),
+        "per_intent": {intent: summarize(values) for intent, values in sorted(per_intent.items())},
+    }
+
+
+async def run_replay(args, records) -> Dict[str, Any]:
+    from benchmarks.webhook_bench import drive_webhook, start_uvicorn
+
+    server = None
+    if args.mode == "uvicorn":
+        server = start_uvicorn(args.host, args.port)
+        client = httpx.AsyncClient(base_url=f"http://{args.host}:{args.port}", timeout=60.0,
+                                   limits=httpx.Limits(max_connections=args.concurrency))
+    else:
+        from main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay")
+
+    try:
+        async with client:
+            if args.speed == 0 and not args.rate:
+                # No pacing: closed loop with a fixed number of concurrent senders
+                result = await drive_webhook(client, [payload for _, payload in records], args.concurrency)
+            else:
+                result = await replay(client, records, speed=args.speed, rate=args.rate,
+                                      max_in_flight=args.concurrency)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    return {"mode": args.mode, "speed": args.speed, "rate": args.rate, **result}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay recorded webhook traffic")
+    parser.add_argument("path", help="Recording file or directory (TRAFFIC_RECORD_DIR)")
+    parser.add_argument("--mode", choices=["in-process", "uvicorn"], default="in-process")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Replay speed relative to the recording (1 = original pacing, 0 = no pacing)")
+    parser.add_argument("--rate", type=float, default=None, help="Send at a fixed rate instead (requests/s)")
+    parser.add_argument("--concurrency", type=int, default=256,
+                        help="Maximum requests in flight (senders when --speed 0)")
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N recorded requests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", default=None, help="Optional path for the JSON report")
+    args = parser.parse_args(argv)
+
+    records = load_recorded(args.path)[:args.limit]
+    if not records:
+        print(f"No recorded requests found in {args.path}")
+        return 1
+
+    report = asyncio.run(run_replay(args, records))
+    latency = report["latency"]
+    print(f"{report['requests']} requests in {report['wall_time_s']}s ({report['throughput_rps']} req/s), "
+          f"p50={latency['p50_ms']:.1f}ms p95={latency['p95_ms']:.1f}ms p99={latency['p99_ms']:.1f}ms  "
+          f"errors={report['errors']}")
+    if "lag" in report:
+        print(f"schedule lag p95={report['lag']['p95_ms']:.1f}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
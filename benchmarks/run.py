@@ -0,0 +1,111 @@
+"""
+Latency and throughput benchmarks for POST /webhook and the recommender hot paths.
+
+Usage (from the repository root):
+    python -m benchmarks.run --mode in-process --concurrency 1 8 32 --requests 300
+    python -m benchmarks.run --mode uvicorn --baseline bench_baseline.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from benchmarks.payloads import load_catalog_vocabulary, generate_payloads, PARAMETER_BUILDERS
+from benchmarks.stats import find_regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Netflix recommender webhook")
+    parser.add_argument("--mode", choices=["in-process", "uvicorn", "both", "none"], default="in-process",
+                        help="How to drive POST /webhook ('none' runs only the microbenchmarks)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32],
+                        help="Concurrency levels to run, one load test each")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per load test")
+    parser.add_argument("--intents", nargs="+", default=None, help="Restrict the payload mix to these intents")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--skip-micro", action="store_true", help="Skip the recommend_* microbenchmarks")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed calls per recommend_* method")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_report.json", help="Where to write the JSON report")
+    parser.add_argument("--baseline", default=None, help="Previous report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Allowed slowdown ratio before a benchmark counts as a regression")
+    return parser.parse_args(argv)
+
+
+async def run_webhook_benchmarks(args, payloads):
+    from benchmarks.webhook_bench import bench_in_process, bench_uvicorn, start_uvicorn
+
+    runs = []
+    if args.mode in ("in-process", "both"):
+        from main import app
+        for concurrency in args.concurrency:
+            print(f"in-process load test, concurrency={concurrency}")
+            runs.append(await bench_in_process(app, payloads, concurrency))
+
+    if args.mode in ("uvicorn", "both"):
+        server = start_uvicorn(args.host, args.port)
+        try:
+            for concurrency in args.concurrency:
+                print(f"uvicorn load test, concurrency={concurrency}")
+                runs.append(await bench_uvicorn(f"http://{args.host}:{args.port}", payloads, concurrency))
+        finally:
+            server.terminate()
+            server.wait()
+
+    return runs
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    vocab = load_catalog_vocabulary()
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "intents": args.intents or list(PARAMETER_BUILDERS),
+        "webhook": [],
+        "microbenchmarks": {},
+    }
+
+    if args.mode != "none":
+        payloads = generate_payloads(vocab, args.requests, intents=args.intents, seed=args.seed)
+        report["webhook"] = asyncio.run(run_webhook_benchmarks(args, payloads))
+
+    if not args.skip_micro:
+        from routes.webhook import recommender
+        from benchmarks.recommender_bench import run_microbenchmarks
+        print("recommend_* microbenchmarks")
+        report["microbenchmarks"] = run_microbenchmarks(recommender, vocab, iterations=args.iterations,
+                                                        seed=args.seed)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+
+    for run in report["webhook"]:
+        latency = run["latency"]
+        print(f"{run['mode']:>10} c={run['concurrency']:<3} {run['throughput_rps']:>8.1f} req/s  "
+              f"p50={latency['p50_ms']:.1f}ms p95={latency['p95_ms']:.1f}ms p99={latency['p99_ms']:.1f}ms  "
+              f"errors={run['errors']}")
+    for method, stats in report["microbenchmarks"].items():
+        print(f"{method:<28} p50={stats['p50_ms']:.2f}ms p95={stats['p95_ms']:.2f}ms")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report, baseline, args.max_regression)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print("-", line)
+            return 1
+        print("\nNo regressions against baseline.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
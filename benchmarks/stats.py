@@ -0,0 +1,47 @@
+import numpy as np
+from typing import Dict, List, Any
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """Summarize latencies given in seconds as milliseconds"""
+    if not latencies:
+        return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+
+    values = np.asarray(latencies, dtype=float) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": int(values.size),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def find_regressions(report: Dict[str, Any],
+                     baseline: Dict[str, Any],
+                     max_regression: float = 0.25,
+                     metric: str = "p50_ms") -> List[str]:
+    """Compare two benchmark reports and describe every entry slower than the allowed ratio"""
+    regressions = []
+
+    def compare(name: str, current: Dict[str, Any], previous: Dict[str, Any]):
+        if not previous or not previous.get(metric):
+            return
+        ratio = current[metric] / previous[metric]
+        if ratio > 1 + max_regression:
+            regressions.append(
+                f"{name}: {metric} {previous[metric]:.3f} -> {current[metric]:.3f} ({ratio:.2f}x)"
+            )
+
+    for method, stats in report.get("microbenchmarks", {}).items():
+        compare(f"microbenchmarks.{method}", stats, baseline.get("microbenchmarks", {}).get(method))
+
+    previous_runs = {(run["mode"], run["concurrency"]): run for run in baseline.get("webhook", [])}
+    for run in report.get("webhook", []):
+        previous = previous_runs.get((run["mode"], run["concurrency"]))
+        if previous:
+            compare(f"webhook.{run['mode']}.c{run['concurrency']}", run["latency"], previous["latency"])
+
+    return regressions
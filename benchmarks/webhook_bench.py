@@ -0,0 +1,90 @@
+import asyncio
+import subprocess
+import sys
+import time
+import httpx
+from collections import defaultdict
+from typing import Dict, List, Any
+from benchmarks.stats import summarize
+
+
+async def drive_webhook(client: httpx.AsyncClient,
+                        payloads: List[Dict[str, Any]],
+                        concurrency: int) -> Dict[str, Any]:
+    """Send every payload to POST /webhook with at most `concurrency` requests in flight"""
+    latencies = []
+    per_intent = defaultdict(list)
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < len(payloads):
+            payload = payloads[next_index]
+            next_index += 1
+
+            start = time.perf_counter()
+            try:
+                response = await client.post("/webhook", json=payload)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            elapsed = time.perf_counter() - start
+
+            if not ok:
+                errors += 1
+                continue
+            latencies.append(elapsed)
+            per_intent[payload["queryResult"]["intent"]["displayName"]].append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_time = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(payloads),
+        "errors": errors,
+        "wall_time_s": round(wall_time, 3),
+        "throughput_rps": round(len(latencies) / wall_time, 2) if wall_time else 0.0,
+        "latency": summarize(latencies),
+        "per_intent": {intent: summarize(values) for intent, values in sorted(per_intent.items())},
+    }
+
+
+async def bench_in_process(app, payloads: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    """Drive the FastAPI app through an in-memory ASGI transport (no sockets involved)"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        result = await drive_webhook(client, payloads, concurrency)
+    return {"mode": "in-process", **result}
+
+
+def start_uvicorn(host: str = "127.0.0.1", port: int = 8765, startup_timeout: float = 120.0) -> subprocess.Popen:
+    """Start `uvicorn main:app` in a subprocess and wait until it answers GET /"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", host, "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL,
+    )
+
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode} during startup")
+        try:
+            if httpx.get(f"http://{host}:{port}/", timeout=1.0).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+
+    process.terminate()
+    raise TimeoutError(f"uvicorn did not start within {startup_timeout} seconds")
+
+
+async def bench_uvicorn(base_url: str, payloads: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    """Drive a running server over HTTP"""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        result = await drive_webhook(client, payloads, concurrency)
+    return {"mode": "uvicorn", **result}
@@ -1,8 +1,32 @@
+import argparse
+import os
+import shutil
+import sys
+import time
+import joblib
 import pandas as pd
 import numpy as np
+import sklearn
+from scipy.sparse import load_npz, save_npz
 from sklearn.feature_extraction.text import TfidfVectorizer
-from typing import Tuple
-import os
+from typing import Any, Dict, Tuple
+
+# Allow running as a script from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.artifacts import (file_digest, stage_key, load_manifest, write_manifest,
+                             CATALOG_CSV, TFIDF_MATRIX, TFIDF_VECTORIZER)
+
+RAW_CSV = 'data/raw/netflix_titles.csv'
+PROCESSED_DIR = 'data/processed'
+
+TFIDF_PARAMS = {
+    "max_features": 5000,
+    "stop_words": "english",
+    "ngram_range": (1, 2),  # Include both unigrams and bigrams
+}
+
+# Bump a stage's version when its code changes, so its cached outputs are rebuilt
+STAGE_VERSIONS = {"clean": 1, "tfidf": 1, "features": 1}
 
 def load_and_clean_data(file_path: str = 'data/raw/netflix_titles.csv') -> pd.DataFrame:
     """
@@ -55,12 +79,23 @@ def load_and_clean_data(file_path: str = 'data/raw/netflix_titles.csv') -> pd.Da
     
     return df
 
-def create_text_features(df: pd.DataFrame) -> Tuple[pd.DataFrame, TfidfVectorizer, np.ndarray]:
+def build_content(df: pd.DataFrame) -> pd.Series:
+    """Combine relevant text fields for content-based features"""
+    return (
+        df['description'] + ' ' +
+        df['cast'] + ' ' +
+        df['director'] + ' ' +
+        df['listed_in']
+    )
+
+def create_text_features(df: pd.DataFrame,
+                         params: Dict[str, Any] = TFIDF_PARAMS) -> Tuple[pd.DataFrame, TfidfVectorizer, np.ndarray]:
     """
     Create text features using TF-IDF vectorization
     
     Args:
         df (pd.DataFrame): Cleaned DataFrame
+        params (dict): TfidfVectorizer parameters
     
     Returns:
         Tuple containing:
@@ -70,20 +105,10 @@ def create_text_features(df: pd.DataFrame) -> Tuple[pd.DataFrame, TfidfVectorize
     """
     print("\nCreating text features...")
     
-    # Combine relevant text fields for content-based features
-    df['content'] = (
-        df['description'] + ' ' +
-        df['cast'] + ' ' +
-        df['director'] + ' ' +
-        df['listed_in']
-    )
+    df['content'] = build_content(df)
     
     # Create TF-IDF features
-    tfidf = TfidfVectorizer(
-        max_features=5000,
-        stop_words='english',
-        ngram_range=(1, 2)  # Include both unigrams and bigrams
-    )
+    tfidf = TfidfVectorizer(**params)
     
     tfidf_matrix = tfidf.fit_transform(df['content'])
     print(f"Created TF-IDF matrix with shape: {tfidf_matrix.shape}")
@@ -133,31 +158,116 @@ def create_additional_features(df: pd.DataFrame) -> pd.DataFrame:
     
     return df
 
-def main():
-    """Main function to execute the preprocessing pipeline"""
+class Stage:
+    """
+    One pipeline stage whose outputs are cached under a content address
+
+    The key hashes the stage's code version, the keys or digests of its inputs
+    and its parameters. If outputs for the key are already in the cache, the
+    stage is skipped and they are loaded instead.
+    """
+
+    def __init__(self, name: str, cache_dir: str, inputs: Dict[str, str], params: Dict[str, Any]):
+        self.name = name
+        self.cache_dir = cache_dir
+        self.inputs = inputs
+        self.params = params
+        self.key = stage_key(name, STAGE_VERSIONS[name], inputs, params)
+
+    def path(self, extension: str) -> str:
+        return os.path.join(self.cache_dir, f"{self.name}-{self.key}.{extension}")
+
+    def cached(self, *extensions: str) -> bool:
+        return all(os.path.exists(self.path(extension)) for extension in extensions)
+
+    def record(self) -> Dict[str, Any]:
+        return {"key": self.key, "version": STAGE_VERSIONS[self.name], "inputs": self.inputs, "params": self.params}
+
+
+def _write_atomic(save, path: str):
+    """Write through a temporary file so an interrupted run never leaves a partial cache entry"""
+    tmp_path = f"{path}.tmp{os.path.splitext(path)[1]}"
+    save(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _publish(source: str, directory: str, name: str) -> Dict[str, Any]:
+    """Copy a cached output to its published name unless it is already there"""
+    target = os.path.join(directory, name)
+    digest = file_digest(source)
+    if not os.path.exists(target) or file_digest(target) != digest:
+        shutil.copyfile(source, target + '.tmp')
+        os.replace(target + '.tmp', target)
+    return {"sha256": digest}
+
+
+def main(raw_path: str = RAW_CSV,
+         output_dir: str = PROCESSED_DIR,
+         tfidf_params: Dict[str, Any] = TFIDF_PARAMS,
+         force: bool = False):
+    """
+    Main function to execute the preprocessing pipeline
+    
+    Stages (clean -> tfidf, clean -> features) are keyed by the raw CSV digest
+    and their parameters; unchanged stages are loaded from output_dir/cache.
+    The published artifacts and manifest.json are rewritten at the end.
+    """
     # Create directories if they don't exist
-    os.makedirs('data/raw', exist_ok=True)
-    os.makedirs('data/processed', exist_ok=True)
+    cache_dir = os.path.join(output_dir, 'cache')
+    os.makedirs(cache_dir, exist_ok=True)
     
     # Load and clean data
-    df = load_and_clean_data()
+    clean = Stage("clean", cache_dir, {"raw": file_digest(raw_path)}, {"pandas": pd.__version__})
+    if clean.cached("pkl") and not force:
+        print(f"clean: unchanged ({clean.key}), loading from cache")
+        cleaned = pd.read_pickle(clean.path("pkl"))
+    else:
+        cleaned = load_and_clean_data(raw_path)
+        _write_atomic(cleaned.to_pickle, clean.path("pkl"))
     
     # Create text features
-    df, tfidf, tfidf_matrix = create_text_features(df)
-    
-    # Create additional features
-    df = create_additional_features(df)
-    
-    # Save processed data and TF-IDF artifacts
+    tfidf_stage = Stage("tfidf", cache_dir, {"clean": clean.key},
+                        {**tfidf_params, "sklearn": sklearn.__version__})
+    if tfidf_stage.cached("npz", "joblib") and not force:
+        print(f"tfidf: unchanged ({tfidf_stage.key}), loading from cache")
+        tfidf = joblib.load(tfidf_stage.path("joblib"))
+        tfidf_matrix = load_npz(tfidf_stage.path("npz"))
+    else:
+        _, tfidf, tfidf_matrix = create_text_features(cleaned.copy(), tfidf_params)
+        _write_atomic(lambda path: save_npz(path, tfidf_matrix), tfidf_stage.path("npz"))
+        _write_atomic(lambda path: joblib.dump(tfidf, path), tfidf_stage.path("joblib"))
+    
+    # Create additional features (content_age depends on the current year)
+    features = Stage("features", cache_dir, {"clean": clean.key}, {"current_year": pd.Timestamp.now().year})
+    if features.cached("csv") and not force:
+        print(f"features: unchanged ({features.key}), loading from cache")
+        df = pd.read_csv(features.path("csv"))
+    else:
+        df = cleaned.copy()
+        df['content'] = build_content(df)
+        df = create_additional_features(df)
+        _write_atomic(lambda path: df.to_csv(path, index=False), features.path("csv"))
+    
+    # Publish the artifacts, then the manifest that ties them to this run
     print("\nSaving processed data and TF-IDF artifacts...")
-    df.to_csv('data/processed/processed_netflix_titles.csv', index=False)
-    
-    # Save TF-IDF matrix and vectorizer
-    from scipy.sparse import save_npz
-    import joblib
-    
-    save_npz('data/processed/tfidf_matrix.npz', tfidf_matrix)
-    joblib.dump(tfidf, 'data/processed/tfidf_vectorizer.joblib')
+    artifacts = {
+        CATALOG_CSV: {**_publish(features.path("csv"), output_dir, CATALOG_CSV),
+                      "stage": "features", "key": features.key, "rows": len(df)},
+        TFIDF_MATRIX: {**_publish(tfidf_stage.path("npz"), output_dir, TFIDF_MATRIX),
+                       "stage": "tfidf", "key": tfidf_stage.key, "rows": tfidf_matrix.shape[0]},
+        TFIDF_VECTORIZER: {**_publish(tfidf_stage.path("joblib"), output_dir, TFIDF_VECTORIZER),
+                           "stage": "tfidf", "key": tfidf_stage.key},
+    }
+    run = stage_key("run", 1, {name: entry["key"] for name, entry in artifacts.items()}, {})
+    previous = load_manifest(output_dir)
+    if previous is not None and previous.get("run") == run:
+        print(f"Artifacts unchanged (run {run})")
+    write_manifest({
+        "run": run,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "stages": {stage.name: stage.record() for stage in (clean, tfidf_stage, features)},
+        "artifacts": artifacts,
+    }, output_dir)
     
     print("\nFinal dataset shape:", df.shape)
     print("\nMissing values summary:")
@@ -165,5 +275,15 @@ def main():
     
     return df, tfidf, tfidf_matrix
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the processed catalog and TF-IDF artifacts")
+    parser.add_argument("--raw", default=RAW_CSV, help="Raw netflix_titles.csv")
+    parser.add_argument("--output-dir", default=PROCESSED_DIR)
+    parser.add_argument("--max-features", type=int, default=TFIDF_PARAMS["max_features"])
+    parser.add_argument("--force", action="store_true", help="Rebuild every stage even if cached")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    df, tfidf, tfidf_matrix = main() 
\ No newline at end of file
+    args = parse_args()
+    df, tfidf, tfidf_matrix = main(args.raw, args.output_dir,
+                                   {**TFIDF_PARAMS, "max_features": args.max_features}, args.force)
@@ -1,11 +1,7 @@
-import pandas as pd
+import argparse
 import numpy as np
 import matplotlib.pyplot as plt
-from typing import Callable
-from models.recommender import NetflixRecommender
-
-# Initialize recommender
-recommender = NetflixRecommender()
+from evaluation.engine import EvaluationEngine, load_ground_truth_jsonl
 
 # Define evaluation ground truth for 5-query version
 eval_5_queries = {
@@ -73,93 +69,75 @@ eval_10_queries = {
 }
 
 
-# Evaluation function with F1
-def evaluate_strategy(strategy_name: str, model_func: Callable, ground_truth: dict, top_k: int = 5):
-    hit_count = 0
-    total_expected = 0
-    total_hits = 0
-    total_returned = 0
-
-    for query, expected in ground_truth.items():
-        try:
-            if strategy_name == "recommend_by_actor":
-                recs = model_func(query, n=top_k)
-            elif strategy_name == "recommend_by_ner":
-                recs = model_func(query, n=top_k)
-            else:
-                recs = model_func(query, n_recommendations=top_k)
-
-            rec_titles = [rec["title"] for rec in recs]
-            hits = set(expected) & set(rec_titles)
-            hit_count += 1 if hits else 0
-            total_expected += len(expected)
-            total_hits += len(hits)
-            total_returned += len(rec_titles)
-        except Exception as e:
-            print(f"Error processing query '{query}': {e}")
-
-    hit_rate = hit_count / len(ground_truth)
-    precision = total_hits / total_returned if total_returned else 0
-    recall = total_hits / total_expected if total_expected else 0
-    f1 = (2 * precision * recall) / (precision + recall) if precision + recall else 0
-
-    return hit_rate, precision, recall, f1
-
-# Collect results
-def collect_results(ground_truth_sets):
-    strategies = {
-        "recommend_similar_content": recommender.recommend_similar_content,
-        "recommend_by_actor": recommender.recommend_by_actor,
-        "recommend_by_ner": recommender.recommend_by_ner,
-    }
-
-    results = {}
-    for strategy, func in strategies.items():
-        gt = ground_truth_sets[strategy]
-        metrics = evaluate_strategy(strategy, func, gt)
-        results[strategy] = {
-            "HitRate": round(metrics[0], 3),
-            "Precision": round(metrics[1], 3),
-            "Recall": round(metrics[2], 3),
-            "F1": round(metrics[3], 3)
-        }
-    return pd.DataFrame(results).T.reset_index().rename(columns={"index": "Strategy"})
-
-df_5 = collect_results(eval_5_queries)
-df_10 = collect_results(eval_10_queries)
-
-# Plot comparison (side-by-side bars)
-fig, axes = plt.subplots(1, 4, figsize=(22, 5))
-metrics = ["HitRate", "Precision", "Recall", "F1"]
-x = np.arange(len(df_5["Strategy"]))
-width = 0.35
-
-for i, metric in enumerate(metrics):
-    bars1 = axes[i].bar(x - width/2, df_5[metric], width, label="5 Queries", alpha=0.7)
-    bars2 = axes[i].bar(x + width/2, df_10[metric], width, label="10 Queries", alpha=0.7)
-
-    for bar in bars1:
-        height = bar.get_height()
-        axes[i].annotate(f'{height:.3f}',
-                         xy=(bar.get_x() + bar.get_width() / 2, height),
-                         xytext=(0, 3),
-                         textcoords="offset points",
-                         ha='center', va='bottom', fontsize=8)
-    for bar in bars2:
-        height = bar.get_height()
-        axes[i].annotate(f'{height:.3f}',
-                         xy=(bar.get_x() + bar.get_width() / 2, height),
-                         xytext=(0, 3),
-                         textcoords="offset points",
-                         ha='center', va='bottom', fontsize=8)
-
-    axes[i].set_title(metric)
-    axes[i].set_xticks(x)
-    axes[i].set_xticklabels(df_5["Strategy"], rotation=30)
-    axes[i].set_ylim(0, 1)
-    axes[i].set_ylabel("Score")
-
-fig.suptitle("Evaluation Metrics Comparison: 5 vs. 10 Ground Truth Queries", fontsize=16)
-fig.legend(loc="upper center", ncol=2)
-fig.tight_layout(rect=[0, 0, 1, 0.93])
-plt.show()
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline evaluation of the recommendation strategies")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: up to 4)")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--ground-truth", default=None,
+                        help="JSONL file of {strategy, query, expected} records to evaluate instead of the built-in sets")
+    parser.add_argument("--output", default=None, help="Write the metrics table to this CSV file")
+    return parser.parse_args()
+
+
+def plot_comparison(df_5, df_10, metrics):
+    """Plot comparison (side-by-side bars)"""
+    fig, axes = plt.subplots(1, len(metrics), figsize=(5.5 * len(metrics), 5))
+    x = np.arange(len(df_5["Strategy"]))
+    width = 0.35
+
+    for i, metric in enumerate(metrics):
+        bars1 = axes[i].bar(x - width/2, df_5[metric], width, label="5 Queries", alpha=0.7)
+        bars2 = axes[i].bar(x + width/2, df_10[metric], width, label="10 Queries", alpha=0.7)
+
+        for bar in bars1:
+            height = bar.get_height()
+            axes[i].annotate(f'{height:.3f}',
+                             xy=(bar.get_x() + bar.get_width() / 2, height),
+                             xytext=(0, 3),
+                             textcoords="offset points",
+                             ha='center', va='bottom', fontsize=8)
+        for bar in bars2:
+            height = bar.get_height()
+            axes[i].annotate(f'{height:.3f}',
+                             xy=(bar.get_x() + bar.get_width() / 2, height),
+                             xytext=(0, 3),
+                             textcoords="offset points",
+                             ha='center', va='bottom', fontsize=8)
+
+        axes[i].set_title(metric)
+        axes[i].set_xticks(x)
+        axes[i].set_xticklabels(df_5["Strategy"], rotation=30)
+        axes[i].set_ylim(0, 1)
+        axes[i].set_ylabel("Score")
+
+    fig.suptitle("Evaluation Metrics Comparison: 5 vs. 10 Ground Truth Queries", fontsize=16)
+    fig.legend(loc="upper center", ncol=2)
+    fig.tight_layout(rect=[0, 0, 1, 0.93])
+    plt.show()
+
+
+def main():
+    args = parse_args()
+    engine = EvaluationEngine(workers=args.workers, top_k=args.top_k)
+
+    if args.ground_truth:
+        df = engine.evaluate(load_ground_truth_jsonl(args.ground_truth))
+        print(df.to_string(index=False))
+        if args.output:
+            df.to_csv(args.output, index=False)
+        return
+
+    # The 5-query set is a subset of the 10-query set, so each query only runs once
+    results = engine.evaluate_sets({"5 Queries": eval_5_queries, "10 Queries": eval_10_queries})
+    df_5, df_10 = results["5 Queries"], results["10 Queries"]
+    for name, df in results.items():
+        print(f"\n{name}")
+        print(df.to_string(index=False))
+    if args.output:
+        df_10.to_csv(args.output, index=False)
+
+    plot_comparison(df_5, df_10, ["HitRate", "Precision", "Recall", "F1", "MRR", f"NDCG@{args.top_k}"])
+
+
+if __name__ == "__main__":
+    main()
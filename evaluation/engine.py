@@ -0,0 +1,160 @@
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import time
+import numpy as np
+import pandas as pd
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Tuple
+from evaluation.metrics import reciprocal_rank, ndcg_at_k
+
+# Strategies that take `n` instead of `n_recommendations`
+N_KWARG_STRATEGIES = {"recommend_by_actor", "recommend_by_director", "recommend_by_ner"}
+
+# Each worker process holds one recommender; with the fork start method it is
+# inherited from the parent so the model is only loaded once overall.
+_recommender = None
+
+
+def _get_recommender():
+    global _recommender
+    if _recommender is None:
+        from models.recommender import NetflixRecommender
+        _recommender = NetflixRecommender()
+    return _recommender
+
+
+def run_query(task: Tuple[str, str, int]) -> Dict[str, Any]:
+    """Run one (strategy, query, top_k) task and return the recommended titles and latency"""
+    strategy, query, top_k = task
+    method = getattr(_get_recommender(), strategy)
+    kwargs = {"n": top_k} if strategy in N_KWARG_STRATEGIES else {"n_recommendations": top_k}
+
+    start = time.perf_counter()
+    try:
+        # The recommender prints debug output on every call
+        with contextlib.redirect_stdout(io.StringIO()):
+            recs = method(query, **kwargs)
+        titles = [rec["title"] for rec in recs]
+        error = None
+    except Exception as e:
+        titles = []
+        error = str(e)
+
+    return {"titles": titles, "latency": time.perf_counter() - start, "error": error}
+
+
+def load_ground_truth_jsonl(path: str) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Load ground truth from a JSONL file
+
+    Each line is {"strategy": ..., "query": ..., "expected": [...]}.
+    """
+    ground_truth = defaultdict(dict)
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            try:
+                ground_truth[record["strategy"]][record["query"]] = list(record["expected"])
+            except KeyError as e:
+                raise ValueError(f"{path}:{line_number} is missing field {e}") from None
+    return dict(ground_truth)
+
+
+class EvaluationEngine:
+    def __init__(self, workers: int = None, top_k: int = 5):
+        self.workers = workers or min(os.cpu_count() or 1, 4)
+        self.top_k = top_k
+        # (strategy, query, top_k) -> query result, shared by every ground truth set
+        self.results: Dict[Tuple[str, str, int], Dict[str, Any]] = {}
+
+    def _run_pending(self, tasks: List[Tuple[str, str, int]]):
+        pending = [task for task in dict.fromkeys(tasks) if task not in self.results]
+        if not pending:
+            return
+
+        if self.workers <= 1 or len(pending) == 1:
+            for task in pending:
+                self.results[task] = run_query(task)
+            return
+
+        if "fork" in multiprocessing.get_all_start_methods():
+            # Load the model before forking so workers share it copy-on-write
+            _get_recommender()
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context()
+
+        chunksize = max(1, len(pending) // (self.workers * 4))
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+            for task, result in zip(pending, pool.map(run_query, pending, chunksize=chunksize)):
+                self.results[task] = result
+
+    def evaluate(self, ground_truth: Dict[str, Dict[str, List[str]]]) -> pd.DataFrame:
+        """Evaluate one ground truth set of {strategy: {query: expected titles}}"""
+        tasks = [(strategy, query, self.top_k) for strategy, queries in ground_truth.items() for query in queries]
+        self._run_pending(tasks)
+
+        rows = {}
+        for strategy, queries in ground_truth.items():
+            rows[strategy] = self._strategy_metrics(strategy, queries)
+        return pd.DataFrame(rows).T.reset_index().rename(columns={"index": "Strategy"})
+
+    def evaluate_sets(self, ground_truth_sets: Dict[str, Dict[str, Dict[str, List[str]]]]) -> Dict[str, pd.DataFrame]:
+        """Evaluate several named ground truth sets, running each distinct query only once"""
+        self._run_pending([
+            (strategy, query, self.top_k)
+            for ground_truth in ground_truth_sets.values()
+            for strategy, queries in ground_truth.items()
+            for query in queries
+        ])
+        return {name: self.evaluate(ground_truth) for name, ground_truth in ground_truth_sets.items()}
+
+    def _strategy_metrics(self, strategy: str, queries: Dict[str, List[str]]) -> Dict[str, float]:
+        hit_count = 0
+        total_expected = 0
+        total_hits = 0
+        total_returned = 0
+        reciprocal_ranks = []
+        ndcgs = []
+        latencies = []
+
+        for query, expected in queries.items():
+            result = self.results[(strategy, query, self.top_k)]
+            latencies.append(result["latency"])
+            if result["error"]:
+                print(f"Error processing query '{query}': {result['error']}")
+                reciprocal_ranks.append(0.0)
+                ndcgs.append(0.0)
+                continue
+
+            rec_titles = result["titles"]
+            hits = set(expected) & set(rec_titles)
+            hit_count += 1 if hits else 0
+            total_expected += len(expected)
+            total_hits += len(hits)
+            total_returned += len(rec_titles)
+            reciprocal_ranks.append(reciprocal_rank(rec_titles, expected, self.top_k))
+            ndcgs.append(ndcg_at_k(rec_titles, expected, self.top_k))
+
+        hit_rate = hit_count / len(queries) if queries else 0
+        precision = total_hits / total_returned if total_returned else 0
+        recall = total_hits / total_expected if total_expected else 0
+        f1 = (2 * precision * recall) / (precision + recall) if precision + recall else 0
+        latencies_ms = np.asarray(latencies) * 1000
+
+        return {
+            "HitRate": round(hit_rate, 3),
+            "Precision": round(precision, 3),
+            "Recall": round(recall, 3),
+            "F1": round(f1, 3),
+            "MRR": round(float(np.mean(reciprocal_ranks)) if reciprocal_ranks else 0.0, 3),
+            f"NDCG@{self.top_k}": round(float(np.mean(ndcgs)) if ndcgs else 0.0, 3),
+            "LatencyMeanMs": round(float(latencies_ms.mean()), 2) if latencies else 0.0,
+            "LatencyP95Ms": round(float(np.percentile(latencies_ms, 95)), 2) if latencies else 0.0,
+        }
@@ -0,0 +1,31 @@
+import math
+from typing import List, Iterable
+
+
+def _first_hit_ranks(recommended: List[str], expected: Iterable[str], k: int) -> List[int]:
+    """1-based ranks of the relevant titles within the top k, counting each title once"""
+    expected = set(expected)
+    seen = set()
+    ranks = []
+    for rank, title in enumerate(recommended[:k], 1):
+        if title in expected and title not in seen:
+            ranks.append(rank)
+        seen.add(title)
+    return ranks
+
+
+def reciprocal_rank(recommended: List[str], expected: Iterable[str], k: int) -> float:
+    """1 / rank of the first relevant title, 0 when none is in the top k"""
+    ranks = _first_hit_ranks(recommended, expected, k)
+    return 1.0 / ranks[0] if ranks else 0.0
+
+
+def ndcg_at_k(recommended: List[str], expected: Iterable[str], k: int) -> float:
+    """Normalized discounted cumulative gain with binary relevance"""
+    expected = set(expected)
+    if not expected:
+        return 0.0
+
+    dcg = sum(1.0 / math.log2(rank + 1) for rank in _first_hit_ranks(recommended, expected, k))
+    ideal = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(expected), k) + 1))
+    return dcg / ideal
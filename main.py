@@ -1,9 +1,37 @@
+import os
+from contextlib import asynccontextmanager
 from typing import Union
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routes.webhook import router as webhook_router
+from starlette.concurrency import run_in_threadpool
+from routes.webhook import router as webhook_router, warm_up
+from routes.recommendations import router as recommendations_router
+from routes.admin import router as admin_router, ADMIN_TOKEN_ENV
+from utils.traffic import (TrafficRecorder, TrafficRecorderMiddleware, load_recorded, hottest_payloads,
+                           RECORD_DIR_ENV, SAMPLE_RATE_ENV, WARMUP_DIR_ENV, WARMUP_QUERIES_ENV, REDACT_ENV,
+                           DEFAULT_REDACT)
 
-app = FastAPI()
+# Sample webhook traffic into rotating JSONL files when a directory is configured
+recorder = None
+if os.environ.get(RECORD_DIR_ENV):
+    redact_paths = os.environ.get(REDACT_ENV)
+    recorder = TrafficRecorder(os.environ[RECORD_DIR_ENV], sample_rate=float(os.environ.get(SAMPLE_RATE_ENV, 0.05)),
+                               redact=[path.strip() for path in redact_paths.split(",") if path.strip()]
+                               if redact_paths is not None else DEFAULT_REDACT)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Answer the hottest recorded queries once before serving: seeds the answers shed requests fall back to
+    if os.environ.get(WARMUP_DIR_ENV):
+        records = load_recorded(os.environ[WARMUP_DIR_ENV])
+        payloads = hottest_payloads(records, top=int(os.environ.get(WARMUP_QUERIES_ENV, 50)))
+        warmed = await run_in_threadpool(warm_up, payloads)
+        print(f"Warmed up with {warmed} recorded queries")
+    yield
+    if recorder is not None:
+        recorder.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -14,8 +42,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if recorder is not None:
+    app.add_middleware(TrafficRecorderMiddleware, recorder=recorder)
+
 # Add routers
 app.include_router(webhook_router)
+app.include_router(recommendations_router)
+
+# Admin routes (profiling) are opt-in: only mounted when a token is configured
+if os.environ.get(ADMIN_TOKEN_ENV):
+    app.include_router(admin_router)
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import os
+import numpy as np
+from scipy.sparse import csr_matrix, spmatrix
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.metrics import silhouette_score
+from sklearn.preprocessing import normalize
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+CLUSTERS_PATH = './data/processed/clusters.npz'
+
+
+def matrix_fingerprint(tfidf_matrix: spmatrix) -> str:
+    """Digest of a sparse matrix's contents, tying saved clusters to the matrix they were fit on"""
+    matrix = csr_matrix(tfidf_matrix, copy=True)
+    matrix.sort_indices()
+    sha = hashlib.sha256(repr((matrix.shape, str(matrix.dtype))).encode())
+    for array in (matrix.indptr, matrix.indices, matrix.data):
+        sha.update(np.ascontiguousarray(array).tobytes())
+    return sha.hexdigest()
+
+
+def fit_clusters(tfidf_matrix: spmatrix,
+                 n_clusters: int = 20,
+                 n_components: int = 100,
+                 batch_size: int = 2048,
+                 silhouette_sample: int = 5000,
+                 random_state: int = 42) -> Dict[str, Any]:
+    """
+    Cluster TF-IDF rows without ever densifying the full matrix
+
+    Args:
+        tfidf_matrix: Sparse N x V TF-IDF matrix (rows L2-normalized)
+        n_clusters: Number of KMeans clusters
+        n_components: TruncatedSVD dimensions the clustering runs in
+        batch_size: MiniBatchKMeans batch size
+        silhouette_sample: Rows sampled to estimate the silhouette score
+
+    Returns:
+        Dict with per-row `labels`, L2-normalized `centroids` in TF-IDF space,
+        the reduced `embedding`, the sampled `silhouette` score and the
+        `fingerprint` of the matrix
+    """
+    n_rows, n_features = tfidf_matrix.shape
+    n_components = min(n_components, n_features - 1, n_rows - 1)
+
+    svd = TruncatedSVD(n_components=n_components, random_state=random_state)
+    embedding = normalize(svd.fit_transform(tfidf_matrix))
+
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size,
+                             n_init=3, random_state=random_state)
+    labels = kmeans.fit_predict(embedding).astype(np.int32)
+
+    silhouette = float(silhouette_score(embedding, labels,
+                                        sample_size=min(silhouette_sample, n_rows),
+                                        random_state=random_state))
+
+    return {
+        "labels": labels,
+        "centroids": cluster_centroids(tfidf_matrix, labels, n_clusters),
+        "embedding": embedding,
+        "silhouette": silhouette,
+        "fingerprint": matrix_fingerprint(tfidf_matrix),
+    }
+
+
+def cluster_centroids(tfidf_matrix: spmatrix, labels: np.ndarray, n_clusters: int) -> np.ndarray:
+    """Mean TF-IDF row of each cluster, L2-normalized so a dot product is a cosine"""
+    membership = csr_matrix(
+        (np.ones(len(labels)), (labels, np.arange(len(labels)))),
+        shape=(n_clusters, len(labels))
+    )
+    centroids = np.asarray((membership @ tfidf_matrix).todense())
+    return normalize(centroids).astype(np.float32)
+
+
+def save_clusters(clusters: Dict[str, Any], path: str = CLUSTERS_PATH):
+    """Save the cluster labels and centroids next to the other processed artifacts"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(path, labels=clusters["labels"], centroids=clusters["centroids"],
+                        fingerprint=np.array(clusters["fingerprint"]))
+
+
+class ClusterIndex:
+    """Coarse partition of the catalog used to restrict similarity scoring to nearby clusters"""
+
+    def __init__(self, labels: np.ndarray, centroids: np.ndarray):
+        self.labels = labels
+        self.centroids = centroids
+        # Row positions of each cluster, ascending so merged candidates keep catalog order
+        order = np.argsort(labels, kind='stable')
+        bounds = np.searchsorted(labels[order], np.arange(len(centroids) + 1))
+        self.members = [order[bounds[c]:bounds[c + 1]] for c in range(len(centroids))]
+
+    @classmethod
+    def load(cls,
+             path: str = CLUSTERS_PATH,
+             n_rows: Optional[int] = None,
+             tfidf_matrix: Optional[spmatrix] = None) -> Optional["ClusterIndex"]:
+        """Load saved clusters, or None if missing or fit on a different catalog or TF-IDF matrix"""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            labels, centroids = data["labels"], data["centroids"]
+            fingerprint = str(data["fingerprint"]) if "fingerprint" in data.files else None
+        if n_rows is not None and len(labels) != n_rows:
+            logger.warning("Ignoring %s: built for %d rows, catalog has %d", path, len(labels), n_rows)
+            return None
+        if tfidf_matrix is not None:
+            if fingerprint is None:
+                logger.warning("%s predates matrix fingerprints; cannot verify it matches the TF-IDF matrix", path)
+            elif fingerprint != matrix_fingerprint(tfidf_matrix):
+                logger.warning("Ignoring %s: fit on a different TF-IDF matrix; rerun analyze_clusters.py", path)
+                return None
+        return cls(labels, centroids)
+
+    def candidates(self, vector: spmatrix, n_probe: int = 3) -> np.ndarray:
+        """Sorted row positions of the `n_probe` clusters whose centroids are closest to `vector`"""
+        scores = np.asarray(vector @ self.centroids.T).ravel()
+        nearest = np.argsort(-scores)[:n_probe]
+        return np.sort(np.concatenate([self.members[c] for c in nearest]))
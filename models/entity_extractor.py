@@ -1,12 +1,14 @@
 import re
 import spacy
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, List, Optional
+from models.title_index import TitleIndex
 
 class EntityExtractor:
-    def __init__(self, dataframe: pd.DataFrame):
+    def __init__(self, dataframe: pd.DataFrame, title_index: Optional[TitleIndex] = None):
         self.df = dataframe
         self.nlp = spacy.load("en_core_web_sm")
+        self.title_index = title_index
 
         # Preprocess genre and title
         self.all_genres = set(g.strip().lower() for g in ','.join(self.df['listed_in'].dropna()).split(','))
@@ -48,7 +50,14 @@ class EntityExtractor:
             if keyword in text.lower() and genre not in entities["genre"]:
                 entities["genre"].append(genre)
 
-        # Match known titles (case-insensitive)
-        lower_text = text.lower()
-        entities["title"] = [title for title in self.titles if title in lower_text]
+        # Match known titles, tolerating typos when a title index is available
+        if self.title_index is not None:
+            entities["title"] = [
+                str(self.df['title'].iloc[title_id]).lower()
+                for title_id, _ in self.title_index.find_in_text(text)
+            ]
+        else:
+            # Case-insensitive substring match
+            lower_text = text.lower()
+            entities["title"] = [title for title in self.titles if title in lower_text]
         return entities
\ No newline at end of file
@@ -0,0 +1,87 @@
+import ast
+import numpy as np
+import pandas as pd
+from collections import defaultdict
+from typing import Dict, List
+
+
+def _parse_genres(value) -> List[str]:
+    """The processed CSV stores the genre list as its Python repr"""
+    if isinstance(value, list):
+        return value
+    if not isinstance(value, str):
+        return []
+    try:
+        return list(ast.literal_eval(value))
+    except (ValueError, SyntaxError):
+        return value.split(',')
+
+
+class FacetViews:
+    """
+    Materialized per-facet views of the catalog
+
+    For every rating, genre, country and type value, holds the row positions
+    of the matching titles presorted by release year (newest first), ties
+    broken by title and then catalog order. Single-facet queries become a
+    slice; multi-value matches merge views by their precomputed rank.
+    Rating and type views are keyed by the exact value, as the queries they
+    serve compare it exactly; genre and country views are keyed in lowercase
+    for case-insensitive substring matching.
+    The views are immutable: a catalog reload builds a new FacetViews.
+    """
+
+    FACETS = ("rating", "genre", "country", "type")
+    EXACT_FACETS = ("rating", "type")
+
+    def __init__(self, df: pd.DataFrame, tiebreak: str = "title"):
+        years = pd.to_numeric(df['release_year'], errors='coerce').fillna(-1).to_numpy()
+        titles = df[tiebreak].fillna("").astype(str).str.lower().to_numpy()
+        positions = np.arange(len(df))
+
+        # np.lexsort sorts by the last key first
+        self.order = np.lexsort((positions, titles, -years))
+        # rank[position] = place of that row in the global order
+        self.rank = np.empty(len(df), dtype=np.int64)
+        self.rank[self.order] = np.arange(len(df))
+
+        values = {
+            "rating": df['rating'].to_numpy(),
+            "country": df['country'].to_numpy(),
+            "type": df['type'].to_numpy(),
+            "genre": df['genres'].map(_parse_genres).to_numpy(),
+        }
+        self.views: Dict[str, Dict[str, np.ndarray]] = {}
+        for facet in self.FACETS:
+            buckets = defaultdict(list)
+            for position in self.order:
+                facet_values = values[facet][position]
+                if facet != "genre":
+                    facet_values = [facet_values]
+                for value in facet_values:
+                    if isinstance(value, str) and value.strip():
+                        buckets[value if facet in self.EXACT_FACETS else value.lower()].append(position)
+            self.views[facet] = {value: np.asarray(ids, dtype=np.int64) for value, ids in buckets.items()}
+
+    def values(self, facet: str) -> List[str]:
+        return sorted(self.views[facet])
+
+    def view(self, facet: str, value: str) -> np.ndarray:
+        """Presorted row positions for one exact facet value (lowercase for genre and country)"""
+        return self.views[facet].get(str(value), np.array([], dtype=np.int64))
+
+    def matching(self, facet: str, substring: str) -> np.ndarray:
+        """Presorted row positions for every facet value containing `substring`"""
+        substring = str(substring).lower()
+        matches = [ids for value, ids in self.views[facet].items() if substring in value]
+        if not matches:
+            return np.array([], dtype=np.int64)
+        if len(matches) == 1:
+            return matches[0]
+        # A title can be in several genres; deduplicate, then restore the global order
+        ids = np.unique(np.concatenate(matches))
+        return ids[np.argsort(self.rank[ids])]
+
+    def intersect(self, ranked: np.ndarray, other: np.ndarray) -> np.ndarray:
+        """Rows of `ranked` that are also in `other`, keeping the order of `ranked`"""
+        return ranked[np.isin(ranked, other)]
@@ -1,186 +1,424 @@
+import io
+import itertools
+import logging
+import numpy as np
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict, Any
+from typing import List, Dict, Tuple, Iterator, NamedTuple, Optional
 import spacy
 from models.entity_extractor import EntityExtractor
-from scipy.sparse import load_npz
+from models.clustering import ClusterIndex
+from models.title_index import TitleIndex
+from models.facet_views import FacetViews
+from utils.artifacts import (read_verified, ArtifactMismatchError, PROCESSED_DIR,
+                             CATALOG_CSV, TFIDF_MATRIX, TFIDF_VECTORIZER)
+from scipy.sparse import csr_matrix, load_npz
 import joblib
+
+# Genre mapping dictionary
+GENRE_MAPPING = {
+    'western': 'westerns',
+    'romantic': 'romantic movies',
+    'comedy': 'comedies',
+    'action': 'action & adventure',
+    'drama': 'dramas',
+    'horror': 'horror movies',
+    'documentary': 'documentaries',
+    'sci-fi': 'sci-fi & fantasy',
+    'thriller': 'thrillers',
+    'crime': 'crime tv shows',
+    'mystery': 'mysteries',
+    'fantasy': 'sci-fi & fantasy',
+    'family': 'family movies',
+    'anime': 'anime features',
+    'sports': 'sports movies',
+    'animated': 'children & family movies',
+    'animation': 'children & family movies',
+    'cartoon': 'children & family movies',
+    'kids': 'children & family movies',
+    'romance': 'romantic movies',
+    'adventure': 'action & adventure',
+    'animation': 'anime features',
+    'children': 'family movies',
+    'crime': 'crime tv shows',
+    'documentary': 'documentaries',
+    'music': 'music & musicals',
+    'reality-tv': 'reality tv',
+    'short': 'short films',
+    'talk': 'talk shows',
+    'war': 'war & politics',
+}
+
+# Handle common variations of country names
+COUNTRY_MAPPING = {
+    'indian': 'india',
+    'american': 'united states',
+    'british': 'united kingdom',
+    'korean': 'south korea',
+    'chinese': 'china',
+    'japanese': 'japan'
+}
+
+logger = logging.getLogger(__name__)
+
+# Catalogs at least this large score similar content within the nearest
+# clusters (or, without usable clusters, against every row per query)
+# instead of holding a dense N x N similarity matrix
+CLUSTER_MIN_CATALOG = 50000
+CLUSTER_N_PROBE = 3
+
+# Session personalization only reorders this many of the top candidates
+PERSONALIZE_WINDOW = 50
+PERSONALIZE_WEIGHT = 0.5
+
+class Catalog(NamedTuple):
+    """
+    Everything derived from one version of the processed catalog
+
+    Never mutated once built: a reload builds a new Catalog, and calls that
+    started on the old one finish on it.
+    """
+    movies_df: pd.DataFrame
+    tfidf_matrix: csr_matrix
+    tfidf: Optional[TfidfVectorizer]
+    clusters: Optional[ClusterIndex]
+    content_similarity: Optional[np.ndarray]
+    title_index: TitleIndex
+    # Maps returned records back to their rows
+    show_ids: pd.Index
+    extractor: Optional[EntityExtractor]
+    # Rating/genre/country/type views presorted by release year
+    facet_views: FacetViews
+    # Distinguishes catalogs, so cursors and session vectors can detect a reload
+    version: int
+
+_catalog_versions = itertools.count(1)
+
 class NetflixRecommender:
+    """
+    Every method reads `self.catalog` once and works on that snapshot, so a
+    concurrent reload_catalog never mixes rows of two catalogs in one answer.
+    Callers that chain several calls (rank, then fetch records) pass the same
+    `catalog` to each of them.
+    """
+
     def __init__(self):
         # Load spaCy model
         self.nlp = spacy.load("en_core_web_sm")
         
+        self.catalog = self._load_catalog()
+    
+    @classmethod
+    def from_frames(cls,
+                    movies_df: pd.DataFrame,
+                    tfidf_matrix,
+                    tfidf: TfidfVectorizer = None,
+                    similarity: bool = True,
+                    extractor: bool = False) -> "NetflixRecommender":
+        """
+        Recommender over an in-memory catalog, e.g. one shard of it
+
+        `similarity=False` skips the similarity structures for engines that only
+        answer filter queries; `extractor=True` enables recommend_by_ner.
+        """
+        recommender = cls.__new__(cls)
+        recommender.nlp = spacy.load("en_core_web_sm") if extractor else None
+        recommender.catalog = recommender._build_catalog(
+            movies_df.reset_index(drop=True), tfidf_matrix, tfidf, similarity=similarity, extractor=extractor
+        )
+        return recommender
+    
+    def _load_catalog(self) -> Catalog:
+        """Load the processed catalog and build every structure derived from it"""
+        # Refuse to mix a CSV and a matrix from different preprocessing runs: the
+        # bytes that were verified are the bytes that get parsed
+        _, contents = read_verified([CATALOG_CSV, TFIDF_MATRIX, TFIDF_VECTORIZER], PROCESSED_DIR)
+        
         # Load preprocessed dataset
-        self.movies_df = pd.read_csv('./data/processed/processed_netflix_titles.csv')
-        self.tfidf_matrix = load_npz('./data/processed/tfidf_matrix.npz')
-        self.tfidf = joblib.load('./data/processed/tfidf_vectorizer.joblib')
+        movies_df = pd.read_csv(io.BytesIO(contents[CATALOG_CSV]))
+        tfidf_matrix = load_npz(io.BytesIO(contents[TFIDF_MATRIX]))
+        tfidf = joblib.load(io.BytesIO(contents[TFIDF_VECTORIZER]))
+        if tfidf_matrix.shape[0] != len(movies_df):
+            raise ArtifactMismatchError(
+                f"{TFIDF_MATRIX} has {tfidf_matrix.shape[0]} rows but {CATALOG_CSV} has {len(movies_df)}"
+            )
+        return self._build_catalog(movies_df, tfidf_matrix, tfidf)
+    
+    def _build_catalog(self,
+                       movies_df: pd.DataFrame,
+                       tfidf_matrix,
+                       tfidf: TfidfVectorizer,
+                       similarity: bool = True,
+                       extractor: bool = True) -> Catalog:
+        tfidf_matrix = tfidf_matrix.tocsr()
+        
+        # Use clusters as a coarse candidate partition for large catalogs,
+        # otherwise calculate the full similarity matrix
+        clusters = None
+        content_similarity = None
+        if similarity and len(movies_df) >= CLUSTER_MIN_CATALOG:
+            clusters = ClusterIndex.load(n_rows=len(movies_df), tfidf_matrix=tfidf_matrix)
+            if clusters is None:
+                # Never the dense matrix at this size: N x N floats do not fit in memory
+                logger.warning("No usable clusters for %d titles; similar content is scored against every "
+                               "title per query. Run analyze_clusters.py to restore the cluster index.",
+                               len(movies_df))
+        elif similarity:
+            content_similarity = cosine_similarity(tfidf_matrix)
         
-        # Calculate similarity matrix
-        self.content_similarity = cosine_similarity(self.tfidf_matrix)
+        # Fuzzy title resolver, shared with the entity extractor
+        title_index = TitleIndex(movies_df['title'])
         
-        self.extractor = EntityExtractor(self.movies_df)
+        return Catalog(
+            movies_df=movies_df,
+            tfidf_matrix=tfidf_matrix,
+            tfidf=tfidf,
+            clusters=clusters,
+            content_similarity=content_similarity,
+            title_index=title_index,
+            show_ids=pd.Index(movies_df['show_id']),
+            extractor=EntityExtractor(movies_df, title_index=title_index) if extractor else None,
+            facet_views=FacetViews(movies_df),
+            version=next(_catalog_versions),
+        )
+    
+    def reload_catalog(self) -> Catalog:
+        """Rebuild everything from the processed files, then swap it in with one assignment"""
+        self.catalog = self._load_catalog()
+        return self.catalog
+    
+    def _snapshot(self, catalog: Optional[Catalog]) -> Catalog:
+        return self.catalog if catalog is None else catalog
+    
+    @property
+    def movies_df(self) -> pd.DataFrame:
+        return self.catalog.movies_df
+    
+    @property
+    def tfidf_matrix(self) -> csr_matrix:
+        return self.catalog.tfidf_matrix
+    
+    def _similarity_scores(self, catalog: Catalog, idx: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Ascending candidate row positions and their cosine similarity to row `idx`"""
+        if catalog.content_similarity is not None:
+            return np.arange(catalog.content_similarity.shape[0]), catalog.content_similarity[idx]
+
+        # TF-IDF rows are L2-normalized, so the dot product is the cosine similarity
+        vector = catalog.tfidf_matrix[idx]
+        if catalog.clusters is None:
+            scores = np.asarray((catalog.tfidf_matrix @ vector.T).todense()).ravel()
+            return np.arange(catalog.tfidf_matrix.shape[0]), scores
+        candidates = catalog.clusters.candidates(vector, n_probe=CLUSTER_N_PROBE)
+        scores = np.asarray((catalog.tfidf_matrix[candidates] @ vector.T).todense()).ravel()
+        return candidates, scores
     
 
-    def recommend_similar_content(self, title: str, n_recommendations: int = 5) -> List[Dict]:
+    def records(self, positions, catalog: Catalog = None) -> List[Dict]:
+        """Catalog rows at the given positions, in order"""
+        return self._snapshot(catalog).movies_df.iloc[positions].to_dict('records')
+
+    def iter_records(self, positions, chunk_size: int = 50, catalog: Catalog = None) -> Iterator[Dict]:
+        """Yield catalog rows lazily so only one chunk is materialized at a time"""
+        catalog = self._snapshot(catalog)
+        for start in range(0, len(positions), chunk_size):
+            yield from self.records(positions[start:start + chunk_size], catalog)
+
+    def positions_of(self, records: List[Dict], catalog: Catalog = None) -> np.ndarray:
+        """Catalog positions of records returned by recommend_*, skipping placeholder rows"""
+        positions = self._snapshot(catalog).show_ids.get_indexer([record.get('show_id') for record in records])
+        return positions[positions >= 0]
+
+    def rerank(self, positions: np.ndarray, preference: csr_matrix,
+               window: int = PERSONALIZE_WINDOW, weight: float = PERSONALIZE_WEIGHT,
+               catalog: Catalog = None) -> np.ndarray:
+        """
+        Re-order the first `window` positions towards a session preference vector
+
+        The affinity of every candidate is one sparse dot product with the
+        preference vector, blended with the candidate's original rank.
+        """
+        tfidf_matrix = self._snapshot(catalog).tfidf_matrix
+        head = positions[:window]
+        if len(head) < 2 or preference.shape[1] != tfidf_matrix.shape[1]:
+            # Nothing to reorder, or the vector predates a catalog reload
+            return positions
+        affinity = np.asarray((tfidf_matrix[head] @ preference.T).todense()).ravel()
+        prior = 1 - np.arange(len(head)) / len(head)
+        order = np.argsort(-((1 - weight) * prior + weight * affinity), kind='stable')
+        return np.concatenate([head[order], positions[window:]])
+
+    def _top(self, catalog: Catalog, positions: np.ndarray, n: int, preference: csr_matrix = None) -> List[Dict]:
+        if preference is not None:
+            positions = self.rerank(positions, preference, catalog=catalog)
+        return self.records(positions[:n], catalog)
+
+    def resolve_title(self, title: str, catalog: Catalog = None) -> Optional[int]:
+        """Position of the title a query refers to, or None"""
+        catalog = self._snapshot(catalog)
+        # Ensure title is a string and convert to lowercase
+        title = str(title).lower()
+        
+        # Find movies with similar titles using flexible matching
+        matching_titles = catalog.movies_df[
+            catalog.movies_df['title'].str.lower().str.contains(title, na=False, regex=False)
+        ]
+        
+        if not matching_titles.empty:
+            # Get the first matching title's index
+            return int(matching_titles.index[0])
+        # Resolve typos and partial titles through the trigram index
+        return catalog.title_index.best_match(title)
+
+    def rank_similar_content(self, title: str, catalog: Catalog = None) -> np.ndarray:
+        """Positions of the titles similar to `title`, most similar first"""
+        catalog = self._snapshot(catalog)
+        idx = self.resolve_title(title, catalog)
+        if idx is None:
+            return np.array([], dtype=int)
+        return self.rank_similar_to(idx, catalog)
+
+    def rank_similar_to(self, idx: int, catalog: Catalog = None) -> np.ndarray:
+        """Positions of the titles similar to the title at position `idx`, most similar first"""
+        catalog = self._snapshot(catalog)
+        # Get similarity scores (excluding the input movie)
+        candidates, scores = self._similarity_scores(catalog, idx)
+        keep = (candidates != idx) & (scores > 0)
+        candidates, scores = candidates[keep], scores[keep]
+        
+        # Sort movies by similarity score, ties stay in catalog order
+        return candidates[np.argsort(-scores, kind='stable')]
+
+    def recommend_similar_content(self, title: str, n_recommendations: int = 5,
+                                  preference: csr_matrix = None, catalog: Catalog = None) -> List[Dict]:
         """Content-based recommendation based on title"""
         try:
-            # Ensure title is a string and convert to lowercase
-            title = str(title).lower()
-            
-            # Find movies with similar titles using flexible matching
-            matching_titles = self.movies_df[
-                self.movies_df['title'].str.lower().str.contains(title, na=False, regex=False)
-            ]
-            
-            if matching_titles.empty:
-                # Try more flexible matching
-                words = title.split()
-                for word in words:
-                    if len(word) > 3:  # Only use words longer than 3 characters
-                        matching_titles = self.movies_df[
-                            self.movies_df['title'].str.lower().str.contains(word, na=False, regex=False)
-                        ]
-                        if not matching_titles.empty:
-                            break
-            
-            if matching_titles.empty:
-                return []
-            
-            # Get the first matching title's index
-            idx = matching_titles.index[0]
-            
-            # Get similarity scores
-            sim_scores = list(enumerate(self.content_similarity[idx]))
-            
-            # Sort movies by similarity score
-            sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-            
-            # Get top N similar movies (excluding the input movie)
-            sim_scores = [s for s in sim_scores if s[0] != idx and s[1] > 0][:n_recommendations]
-            
-            if not sim_scores:
-                return []
-            
-            # Get movie indices
-            movie_indices = [i[0] for i in sim_scores]
-            
-            # Return recommended movies
-            recommendations = self.movies_df.iloc[movie_indices]
-            return recommendations.to_dict('records')
+            catalog = self._snapshot(catalog)
+            return self._top(catalog, self.rank_similar_content(title, catalog), n_recommendations, preference)
         
         except Exception as e:
             print(f"Error in recommend_similar_content: {str(e)}")
             return []
 
-    def recommend_by_director(self, director_name: str, n: int = 5) -> List[Dict]:
-        """Strict recommendation based on exact director name"""
+    def recommend_similar_to(self, idx: int, n_recommendations: int = 5,
+                             preference: csr_matrix = None, catalog: Catalog = None) -> List[Dict]:
+        """Content-based recommendation for a title already resolved with resolve_title"""
+        try:
+            catalog = self._snapshot(catalog)
+            return self._top(catalog, self.rank_similar_to(idx, catalog), n_recommendations, preference)
+        
+        except Exception as e:
+            print(f"Error in recommend_similar_to: {str(e)}")
+            return []
+
+    def rank_by_director(self, director_name: str, catalog: Catalog = None) -> np.ndarray:
+        """Positions of the titles by exactly this director, in catalog order"""
+        movies_df = self._snapshot(catalog).movies_df
         director_name = director_name.strip().lower()
-        df_directors = self.movies_df[self.movies_df['director'].notna()]
+        directors = movies_df['director']
 
-        # 1. Try exact match (case-insensitive)
-        exact_match = df_directors[
-            df_directors['director'].str.lower() == director_name
-        ]
+        # Exact match (case-insensitive)
+        exact_match = movies_df[directors.notna() & (directors.str.lower() == director_name)]
         print("[DEBUG] Director match results:", exact_match)
-        if not exact_match.empty:
-            return exact_match.head(n).to_dict('records')
-
-        # 2. If no match, return empty to trigger fallback
-        return []
+        return exact_match.index.to_numpy()
 
+    def recommend_by_director(self, director_name: str, n: int = 5, preference: csr_matrix = None,
+                              catalog: Catalog = None) -> List[Dict]:
+        """Strict recommendation based on exact director name"""
+        catalog = self._snapshot(catalog)
+        # An empty result triggers the caller's fallback
+        return self._top(catalog, self.rank_by_director(director_name, catalog), n, preference)
 
-    def recommend_by_actor(self, actor_name: str, n: int = 5) -> List[Dict]:
+    def rank_by_actor(self, actor_name: str, catalog: Catalog = None) -> np.ndarray:
+        """Positions of the titles whose cast contains exactly this actor, in catalog order"""
+        movies_df = self._snapshot(catalog).movies_df
         actor_name = actor_name.strip().lower()
-        df_cast = self.movies_df[self.movies_df['cast'].notna()]
+        df_cast = movies_df[movies_df['cast'].notna()]
 
         # Only return exact matches
         exact_match = df_cast[df_cast['cast'].str.lower().str.split(', ').apply(lambda x: actor_name in [a.strip().lower() for a in x])]
         print("[DEBUG] Actor match results:", exact_match)
-        if not exact_match.empty:
-            return exact_match.head(n).to_dict('records')
-        
-        return []
+        return exact_match.index.to_numpy()
+
+    def recommend_by_actor(self, actor_name: str, n: int = 5, preference: csr_matrix = None,
+                           catalog: Catalog = None) -> List[Dict]:
+        catalog = self._snapshot(catalog)
+        return self._top(catalog, self.rank_by_actor(actor_name, catalog), n, preference)
 
+    def rank_by_rating(self, rating: str, catalog: Catalog = None) -> np.ndarray:
+        """Positions of the titles with this rating, most recent first"""
+        return self._snapshot(catalog).facet_views.view('rating', rating)
 
-    def recommend_by_rating(self, rating: str, n_recommendations: int = 5) -> List[Dict]:
+    def recommend_by_rating(self, rating: str, n_recommendations: int = 5,
+                            preference: csr_matrix = None, catalog: Catalog = None) -> List[Dict]:
         """Recommendation based on rating (e.g., 'TV-MA', 'PG-13', 'R', etc.)"""
-        rated_content = self.movies_df[
-            self.movies_df['rating'] == rating
-        ].sort_values('release_year', ascending=False)  # Prioritize recent content
+        catalog = self._snapshot(catalog)
+        return self._top(catalog, self.rank_by_rating(rating, catalog), n_recommendations, preference)
+
+    def rank_by_genre(self, genre: str, catalog: Catalog = None) -> np.ndarray:
+        """Positions of the titles in this genre, most recent first"""
+        views = self._snapshot(catalog).facet_views
+        # Ensure genre is a string and convert to lowercase
+        genre = str(genre).lower()
+        
+        # Get the mapped genre or use original if no mapping exists
+        search_genre = GENRE_MAPPING.get(genre, genre)
+        
+        # Merge the presorted views of every genre containing the search term
+        positions = views.matching('genre', search_genre)
         
-        return rated_content.head(n_recommendations).to_dict('records')
+        if len(positions) == 0:
+            # Try searching with original genre if mapped genre returned no results
+            positions = views.matching('genre', genre)
+        
+        return positions
 
-    def recommend_by_genre(self, genre: str, n_recommendations: int = 5) -> List[Dict]:
+    def recommend_by_genre(self, genre: str, n_recommendations: int = 5,
+                           preference: csr_matrix = None, catalog: Catalog = None) -> List[Dict]:
         """Genre-based recommendation"""
         try:
-            # Ensure genre is a string and convert to lowercase
-            genre = str(genre).lower()
-            
-            # Genre mapping dictionary
-            genre_mapping = {
-                'western': 'westerns',
-                'romantic': 'romantic movies',
-                'comedy': 'comedies',
-                'action': 'action & adventure',
-                'drama': 'dramas',
-                'horror': 'horror movies',
-                'documentary': 'documentaries',
-                'sci-fi': 'sci-fi & fantasy',
-                'thriller': 'thrillers',
-                'crime': 'crime tv shows',
-                'mystery': 'mysteries',
-                'fantasy': 'sci-fi & fantasy',
-                'family': 'family movies',
-                'anime': 'anime features',
-                'sports': 'sports movies',
-                'animated': 'children & family movies',
-                'animation': 'children & family movies',
-                'cartoon': 'children & family movies',
-                'kids': 'children & family movies',
-                'romance': 'romantic movies',
-                'adventure': 'action & adventure',
-                'animation': 'anime features',
-                'children': 'family movies',
-                'crime': 'crime tv shows',
-                'documentary': 'documentaries',
-                'music': 'music & musicals',
-                'reality-tv': 'reality tv',
-                'short': 'short films',
-                'talk': 'talk shows',
-                'war': 'war & politics',
-            }
-            
-            # Get the mapped genre or use original if no mapping exists
-            search_genre = genre_mapping.get(genre, genre)
-            
-            # Use the genres list column instead of listed_in
-            genre_content = self.movies_df[
-                self.movies_df['genres'].apply(
-                    lambda x: any(search_genre in g.lower() for g in eval(x))
-                )
-            ]
-            
-            if genre_content.empty:
-                # Try searching with original genre if mapped genre returned no results
-                genre_content = self.movies_df[
-                    self.movies_df['genres'].apply(
-                        lambda x: any(genre in g.lower() for g in eval(x))
-                    )
-                ]
-            
-            if genre_content.empty:
-                return []
-            
-            # Sort by release year (most recent first)
-            genre_content = genre_content.sort_values('release_year', ascending=False)
-            
-            return genre_content.head(n_recommendations).to_dict('records')
+            catalog = self._snapshot(catalog)
+            return self._top(catalog, self.rank_by_genre(genre, catalog), n_recommendations, preference)
         
         except Exception as e:
             print(f"Error in recommend_by_genre: {str(e)}")
             return []
 
+    def rank_by_multi(self,
+                      genre: str = None,
+                      director: str = None,
+                      actor: str = None,
+                      rating: str = None,
+                      release_year: int = None,
+                      country: str = None,
+                      catalog: Catalog = None) -> np.ndarray:
+        """Positions of the titles matching every given criterion, most recent first"""
+        catalog = self._snapshot(catalog)
+        views = catalog.facet_views
+        positions = views.order
+        
+        # Facet criteria narrow the candidates through the presorted views
+        if country:
+            search_country = COUNTRY_MAPPING.get(country.lower(), country.lower())
+            positions = views.matching('country', search_country)
+        if genre:
+            positions = views.intersect(positions, views.matching('genre', genre))
+        if rating:
+            positions = views.intersect(positions, views.view('rating', rating))
+        
+        # The remaining criteria are only checked on the candidates
+        if director or actor or release_year:
+            candidates = catalog.movies_df.iloc[positions]
+            mask = np.ones(len(candidates), dtype=bool)
+            if director:
+                mask &= candidates['director'].str.contains(director, na=False, case=False).to_numpy()
+            if actor:
+                mask &= candidates['cast'].str.contains(actor, na=False, case=False).to_numpy()
+            if release_year:
+                mask &= candidates['release_year'].astype(str).str.contains(str(release_year), na=False).to_numpy()
+            positions = positions[mask]
+        
+        return positions
 
     def recommend_by_multi(self, 
                           genre: str = None, 
@@ -189,68 +427,31 @@ class NetflixRecommender:
                           rating: str = None,
                           release_year: int = None,
                           country: str = None,
-                          n_recommendations: int = 5) -> List[Dict]:
+                          n_recommendations: int = 5,
+                          preference: csr_matrix = None,
+                          catalog: Catalog = None) -> List[Dict]:
         """Multi-criteria based recommendation"""
-        filtered_df = self.movies_df.copy()
-        
-        if country:
-            # Handle common variations of country names
-            country_mapping = {
-                'indian': 'india',
-                'american': 'united states',
-                'british': 'united kingdom',
-                'korean': 'south korea',
-                'chinese': 'china',
-                'japanese': 'japan'
-            }
-            search_country = country_mapping.get(country.lower(), country.lower())
-            filtered_df = filtered_df[
-                filtered_df['country'].str.lower().str.contains(search_country, na=False)
-            ]
-        
-        if genre:
-            # Use the genres list column
-            filtered_df = filtered_df[
-                filtered_df['genres'].apply(
-                    lambda x: any(genre.lower() in g.lower() for g in eval(x))
-                )
-            ]
-        if director:
-            filtered_df = filtered_df[
-                filtered_df['director'].str.contains(director, na=False, case=False)
-            ]
-        if actor:
-            filtered_df = filtered_df[
-                filtered_df['cast'].str.contains(actor, na=False, case=False)
-            ]
-        if rating:
-            filtered_df = filtered_df[
-                filtered_df['rating'] == rating
-            ]
-        if release_year:
-            filtered_df = filtered_df[
-                filtered_df['release_year'].astype(str).str.contains(str(release_year), na=False)
-            ]
-            
-        # Return empty list if no results found
-        if filtered_df.empty:
-            return []
-        
-        return filtered_df.sort_values('release_year', ascending=False).head(n_recommendations).to_dict('records')
+        catalog = self._snapshot(catalog)
+        positions = self.rank_by_multi(genre=genre, director=director, actor=actor,
+                                       rating=rating, release_year=release_year, country=country,
+                                       catalog=catalog)
+        return self._top(catalog, positions, n_recommendations, preference)
     
-    def recommend_by_ner(self, message: str, n: int = 5) -> List[Dict]:
+    def recommend_by_ner(self, message: str, n: int = 5, preference: csr_matrix = None,
+                         catalog: Catalog = None) -> List[Dict]:
         """Use extracted entities to recommend content"""
-        entities = self.extractor.extract_entities(message)
+        catalog = self._snapshot(catalog)
+        entities = catalog.extractor.extract_entities(message)
         print("[NER DEBUG] entities extracted:", entities)
 
         # 1. Attempt to recommend based on person's name (actor or director)
         if entities["person"]:
             person = entities["person"][0]
-            results = self.recommend_by_actor(person)
+            results = self.recommend_by_actor(person, preference=preference, catalog=catalog)
             if results:
                 return results
             
-            results = self.recommend_by_director(person)
+            results = self.recommend_by_director(person, preference=preference, catalog=catalog)
             print("[DEBUG] Ner match results:", results)  # This line is critical!!
             if results:
                 return results
@@ -258,14 +459,14 @@ class NetflixRecommender:
         # 2. Attempt to recommend based on movie/show title
         if entities["title"]:
             title = entities["title"][0]
-            results = self.recommend_similar_content(title)
+            results = self.recommend_similar_content(title, preference=preference, catalog=catalog)
             if results:
                 return results
 
         # 3. Attempt to recommend based on genre
         if entities["genre"]:
             genre = entities["genre"][0]
-            return self.recommend_by_genre(genre)
+            return self.recommend_by_genre(genre, preference=preference, catalog=catalog)
 
         # 4. Fallback: custom message + random drama
         fallback_header = [{
@@ -275,8 +476,8 @@ class NetflixRecommender:
         }]
 
         # Ensure all required fields are present
-        drama_df = self.movies_df[
-            self.movies_df['listed_in'].str.contains("Drama", case=False, na=False)
+        drama_df = catalog.movies_df[
+            catalog.movies_df['listed_in'].str.contains("Drama", case=False, na=False)
         ].dropna(subset=["title", "description", "release_year"])
 
         # Generate recommendations safely
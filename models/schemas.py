@@ -1,5 +1,5 @@
-from typing import Dict, Any
-from pydantic import BaseModel
+from typing import Annotated, Dict, Any, Optional
+from pydantic import BaseModel, BeforeValidator, ConfigDict
 
 class Intent(BaseModel):
     displayName: str
@@ -9,4 +9,62 @@ class QueryResult(BaseModel):
     parameters: Dict[str, Any]
 
 class DialogflowRequest(BaseModel):
-    queryResult: QueryResult 
\ No newline at end of file
+    queryResult: QueryResult
+    # projects/<project>/agent/sessions/<session id>, stable across a conversation
+    session: Optional[str] = None
+
+def first_value(value: Any) -> Optional[str]:
+    """Dialogflow sends entity parameters as lists; the processors use the first value"""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if value is None or value == "":
+        return None
+    return str(value)
+
+# Missing, empty and [] all become None
+Parameter = Annotated[Optional[str], BeforeValidator(first_value)]
+
+class IntentParameters(BaseModel):
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+class SimilarContentParameters(IntentParameters):
+    title: Parameter = None
+
+class DirectorParameters(IntentParameters):
+    director_name: Parameter = None
+
+class ActorParameters(IntentParameters):
+    cast_name: Parameter = None
+
+class GenreParameters(IntentParameters):
+    genre: Parameter = None
+
+class RatingParameters(IntentParameters):
+    rating: Parameter = None
+
+class MultiParameters(IntentParameters):
+    genre: Parameter = None
+    director: Parameter = None
+    actor: Parameter = None
+    rating: Parameter = None
+    country: Parameter = None
+
+class TextParameters(IntentParameters):
+    text: Parameter = None
+
+INTENT_PARAMETERS = {
+    "recommend_similar_content": SimilarContentParameters,
+    "recommend_by_director": DirectorParameters,
+    "recommend_by_actor": ActorParameters,
+    "recommend_by_genre": GenreParameters,
+    "recommend_by_rating": RatingParameters,
+    "recommend_by_multi": MultiParameters,
+    "recommend_by_text": TextParameters
+}
+
+def parse_parameters(intent: str, parameters: Dict[str, Any]) -> Optional[IntentParameters]:
+    """Typed parameters for `intent`, or None if the intent is unknown"""
+    model = INTENT_PARAMETERS.get(intent)
+    if model is None:
+        return None
+    return model.model_validate(parameters)
@@ -0,0 +1,539 @@
+"""
+Sharded catalog with scatter-gather query execution.
+
+Titles and their TF-IDF rows are partitioned round-robin (`global_id % n_shards`)
+across shard servers. Every shard wraps a NetflixRecommender built from its
+partition, so it answers with the same rank_* semantics as the single-node
+engine; each result carries a merge key and the coordinator merges the
+per-shard top-N lists with a heap. Ties are broken by global id, so merged
+filter results match the single-node order. Shards score similar content
+exhaustively within their partition, which matches the single-node engine
+below CLUSTER_MIN_CATALOG; above it the single-node engine only probes the
+nearest clusters and is approximate.
+
+Split the processed catalog once, on a machine that can hold it, then run
+every node over its own partition only (from the repository root):
+    python -m models.sharding --split --shards 4
+    SHARD_AUTHKEY=secret python -m models.sharding --shard 0 --shards 4 --port 9100
+"""
+import argparse
+import heapq
+import io
+import itertools
+import multiprocessing
+import os
+import secrets
+import shutil
+import socket
+import struct
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+from multiprocessing.connection import Connection, answer_challenge, deliver_challenge
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from scipy.sparse import load_npz, save_npz
+from sklearn.metrics.pairwise import cosine_similarity
+from models.recommender import NetflixRecommender
+from utils.artifacts import (read_verified, load_manifest, write_manifest, file_digest, ArtifactMismatchError,
+                             PROCESSED_DIR, CATALOG_CSV, TFIDF_MATRIX)
+
+# Requests are unpickled by the shard, so the key is what stands between the
+# port and code execution: shard nodes refuse to start without one
+AUTHKEY_ENV = "SHARD_AUTHKEY"
+# Seconds a peer gets to complete the authkey handshake
+HANDSHAKE_TIMEOUT = 5.0
+
+SHARDS_DIR = os.path.join(PROCESSED_DIR, "shards")
+GLOBAL_ID = "global_id"
+
+# How each rank_* method orders its results, which decides the merge key
+CATALOG_ORDER = "catalog"
+RECENT_ORDER = "recent"
+RANK_ORDERS = {
+    "rank_by_director": CATALOG_ORDER,
+    "rank_by_actor": CATALOG_ORDER,
+    "rank_by_rating": RECENT_ORDER,
+    "rank_by_genre": RECENT_ORDER,
+    "rank_by_multi": RECENT_ORDER,
+}
+
+
+def shard_of(global_id: int, n_shards: int) -> int:
+    return global_id % n_shards
+
+
+def partition(movies_df: pd.DataFrame, tfidf_matrix, n_shards: int) -> List[Tuple[pd.DataFrame, Any, np.ndarray]]:
+    """Split the catalog round-robin; every shard keeps its rows in catalog order"""
+    tfidf_matrix = tfidf_matrix.tocsr()
+    parts = []
+    for shard in range(n_shards):
+        global_ids = np.arange(shard, len(movies_df), n_shards)
+        parts.append((movies_df.iloc[global_ids].reset_index(drop=True), tfidf_matrix[global_ids], global_ids))
+    return parts
+
+
+def shard_dir(shard: int, n_shards: int, directory: str = SHARDS_DIR) -> str:
+    return os.path.join(directory, f"{shard:03d}-of-{n_shards:03d}")
+
+
+def publish_shards(movies_df: pd.DataFrame, tfidf_matrix, n_shards: int,
+                   directory: str = SHARDS_DIR, run: Optional[str] = None) -> List[str]:
+    """
+    Write every partition as its own CSV and TF-IDF matrix with a manifest
+
+    A shard node then loads only its partition (load_shard) instead of the
+    whole catalog. Column dtypes of the full catalog are recorded so every
+    partition reads back with the same types, even one whose column is all NaN.
+    """
+    dtypes = {column: str(dtype) for column, dtype in movies_df.dtypes.items()}
+    paths = []
+    for shard, (movies_part, tfidf_part, global_ids) in enumerate(partition(movies_df, tfidf_matrix, n_shards)):
+        path = shard_dir(shard, n_shards, directory)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.makedirs(path)
+        movies_part.assign(**{GLOBAL_ID: global_ids}).to_csv(os.path.join(path, CATALOG_CSV), index=False)
+        save_npz(os.path.join(path, TFIDF_MATRIX), tfidf_part)
+        write_manifest({
+            "run": run,
+            "shard": shard,
+            "shards": n_shards,
+            "dtypes": dtypes,
+            "artifacts": {name: {"sha256": file_digest(os.path.join(path, name)), "rows": len(global_ids)}
+                          for name in (CATALOG_CSV, TFIDF_MATRIX)},
+        }, path)
+        paths.append(path)
+    return paths
+
+
+def load_shard(shard: int, n_shards: int, directory: str = SHARDS_DIR) -> "CatalogShard":
+    """The partition publish_shards wrote for this shard, verified against its manifest"""
+    path = shard_dir(shard, n_shards, directory)
+    if load_manifest(path) is None:
+        raise FileNotFoundError(f"No shard manifest in {path}; run python -m models.sharding --split --shards {n_shards}")
+    manifest, contents = read_verified([CATALOG_CSV, TFIDF_MATRIX], path)
+
+    movies_df = pd.read_csv(io.BytesIO(contents[CATALOG_CSV]), dtype=manifest["dtypes"])
+    tfidf_matrix = load_npz(io.BytesIO(contents[TFIDF_MATRIX])).tocsr()
+    if tfidf_matrix.shape[0] != len(movies_df):
+        raise ArtifactMismatchError(f"{path}: {tfidf_matrix.shape[0]} TF-IDF rows for {len(movies_df)} titles")
+    global_ids = movies_df.pop(GLOBAL_ID).to_numpy()
+    return CatalogShard(movies_df, tfidf_matrix, global_ids)
+
+
+class CatalogShard:
+    """One partition of the catalog, answering with global ids and merge keys"""
+
+    def __init__(self, movies_df: pd.DataFrame, tfidf_matrix, global_ids: Sequence[int]):
+        self.global_ids = np.asarray(global_ids, dtype=np.int64)
+        # Similarity is scored against a query vector, so no local similarity matrix
+        self.engine = NetflixRecommender.from_frames(movies_df, tfidf_matrix, similarity=False)
+
+        # The same sort keys FacetViews orders by, so merged views match the global one
+        df = self.engine.movies_df
+        self.years = pd.to_numeric(df['release_year'], errors='coerce').fillna(-1).to_numpy()
+        self.titles = df['title'].fillna("").astype(str).str.lower().to_numpy()
+
+    def ping(self) -> int:
+        return len(self.global_ids)
+
+    def resolve(self, title: str) -> Optional[Tuple[tuple, int, Any]]:
+        """
+        This shard's best candidate for a query title as (key, global id, TF-IDF row)
+
+        Mirrors NetflixRecommender.resolve_title: the first title containing
+        the query wins, otherwise the closest trigram match. The smallest key
+        across shards is the title the single-node engine would pick.
+        """
+        title = str(title).lower()
+        contains = np.flatnonzero(pd.Series(self.titles).str.contains(title, regex=False).to_numpy())
+        if len(contains):
+            local, key = contains[0], (0, 0.0)
+        else:
+            matches = self.engine.catalog.title_index.search(title, limit=1)
+            if not matches:
+                return None
+            local, key = matches[0][0], (1, -matches[0][1])
+        global_id = int(self.global_ids[local])
+        return key + (global_id,), global_id, self.engine.tfidf_matrix[local]
+
+    def _entries(self, positions: np.ndarray, keys: List[tuple]) -> List[Tuple[tuple, Dict]]:
+        return list(zip(keys, self.engine.records(positions)))
+
+    def similar(self, vector, exclude: int, n: int) -> List[Tuple[tuple, Dict]]:
+        """Top `n` titles by cosine similarity to `vector`, keyed (-score, global id)"""
+        scores = cosine_similarity(self.engine.tfidf_matrix, vector).ravel()
+        keep = (self.global_ids != exclude) & (scores > 0)
+        positions = np.flatnonzero(keep)
+        positions = positions[np.argsort(-scores[positions], kind='stable')][:n]
+        keys = [(-float(scores[p]), int(self.global_ids[p])) for p in positions]
+        return self._entries(positions, keys)
+
+    def rank(self, method: str, n: int, kwargs: Dict[str, Any]) -> List[Tuple[tuple, Dict]]:
+        """Top `n` results of a rank_* filter method, with the key its order sorts by"""
+        order = RANK_ORDERS[method]
+        positions = getattr(self.engine, method)(**kwargs)[:n]
+        if order == CATALOG_ORDER:
+            keys = [(int(self.global_ids[p]),) for p in positions]
+        else:
+            keys = [(-self.years[p], self.titles[p], int(self.global_ids[p])) for p in positions]
+        return self._entries(positions, keys)
+
+
+def _set_io_timeout(fd: int, seconds: Optional[float]):
+    """
+    Bound blocking reads and writes on a socket fd; None removes the bound
+
+    Connection reads the fd directly, so a socket-object timeout does not
+    apply; the kernel-level SO_RCVTIMEO/SO_SNDTIMEO do, and a read that runs
+    out of time fails with an OSError.
+    """
+    seconds = seconds or 0.0
+    if sys.platform == "win32":
+        value = struct.pack("I", int(seconds * 1000))
+    else:
+        value = struct.pack("ll", int(seconds), int(seconds % 1 * 1_000_000))
+    sock = socket.socket(fileno=fd)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVTIMEO, value)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDTIMEO, value)
+    finally:
+        sock.detach()
+
+
+class ShardServer:
+    """
+    Serves one CatalogShard over multiprocessing.connection, one thread per client
+
+    Connections are accepted as raw sockets and authenticated on their own
+    thread with a timeout, so a peer that connects and stays silent cannot
+    hold up the accept loop.
+    """
+
+    METHODS = ("ping", "resolve", "similar", "rank")
+
+    def __init__(self, shard: CatalogShard, authkey: bytes, address: Tuple[str, int] = ("127.0.0.1", 0),
+                 handshake_timeout: float = HANDSHAKE_TIMEOUT):
+        self.shard = shard
+        self.authkey = authkey
+        self.handshake_timeout = handshake_timeout
+        self.listener = socket.create_server(address)
+        self.address = self.listener.getsockname()[:2]
+        self._closed = False
+
+    def serve_forever(self):
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except OSError:
+                if self._closed:
+                    return
+                continue
+            threading.Thread(target=self._serve, args=(sock,), daemon=True).start()
+
+    def _authenticate(self, sock: socket.socket) -> Optional[Connection]:
+        sock.setblocking(True)
+        conn = Connection(sock.detach())
+        try:
+            _set_io_timeout(conn.fileno(), self.handshake_timeout)
+            deliver_challenge(conn, self.authkey)
+            answer_challenge(conn, self.authkey)
+            # Authenticated connections are pooled by the coordinator and may idle
+            _set_io_timeout(conn.fileno(), None)
+        except Exception:
+            # A silent peer, or one that failed authentication
+            conn.close()
+            return None
+        return conn
+
+    def _serve(self, sock: socket.socket):
+        conn = self._authenticate(sock)
+        if conn is None:
+            return
+        with conn:
+            while True:
+                try:
+                    method, args, kwargs = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    if method not in self.METHODS:
+                        raise ValueError(f"Unknown shard method: {method}")
+                    reply = ("ok", getattr(self.shard, method)(*args, **kwargs))
+                except Exception as e:
+                    reply = ("error", f"{type(e).__name__}: {e}")
+                conn.send(reply)
+
+    def close(self):
+        self._closed = True
+        self.listener.close()
+
+
+class LocalShards(NamedTuple):
+    processes: List[multiprocessing.Process]
+    addresses: List[Tuple[str, int]]
+    # Generated per start_local_shards call, never written anywhere
+    authkey: bytes
+
+    def coordinator(self, **kwargs) -> "ShardCoordinator":
+        return ShardCoordinator(self.addresses, self.authkey, **kwargs)
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+
+
+def _serve_partition(movies_df, tfidf_matrix, global_ids, authkey, address_pipe):
+    server = ShardServer(CatalogShard(movies_df, tfidf_matrix, global_ids), authkey)
+    address_pipe.send(server.address)
+    address_pipe.close()
+    server.serve_forever()
+
+
+def start_local_shards(movies_df: pd.DataFrame, tfidf_matrix, n_shards: int) -> LocalShards:
+    """
+    Run each partition as a shard server in a local process, for testing and benchmarks
+
+    The shards bind to the loopback interface and share a random authkey,
+    which only the returned LocalShards (and so its coordinator) knows.
+    """
+    authkey = secrets.token_bytes(32)
+    processes, addresses = [], []
+    for movies_part, tfidf_part, global_ids in partition(movies_df, tfidf_matrix, n_shards):
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=_serve_partition,
+                                          args=(movies_part, tfidf_part, global_ids, authkey, sender),
+                                          daemon=True)
+        process.start()
+        addresses.append(receiver.recv())
+        processes.append(process)
+    return LocalShards(processes, addresses, authkey)
+
+
+class ShardUnavailable(TimeoutError):
+    def __init__(self, missing: List[int]):
+        super().__init__(f"Shards did not answer in time: {missing}")
+        self.missing = missing
+
+
+class GatherResult(NamedTuple):
+    records: List[Dict]
+    # Shards that timed out or failed; their titles are absent from `records`
+    missing: List[int]
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.missing)
+
+
+class ShardCoordinator:
+    """
+    Scatter-gather front end with the recommend_* API of NetflixRecommender
+
+    Holds no catalog data: titles are resolved by asking every shard for its
+    best candidate, and everything else is ranked on the shards. A shard that does
+    not answer within `timeout` seconds is left out: the result is partial, or
+    ShardUnavailable is raised when `allow_partial` is False.
+    recommend_by_ner is not supported in sharded mode.
+    """
+
+    def __init__(self,
+                 addresses: List[Tuple[str, int]],
+                 authkey: bytes,
+                 timeout: float = 2.0,
+                 allow_partial: bool = True):
+        self.addresses = list(addresses)
+        self.authkey = authkey
+        self.timeout = timeout
+        self.allow_partial = allow_partial
+        self._idle: List[List[Connection]] = [[] for _ in self.addresses]
+        self._lock = threading.Lock()
+        self.counters = {"queries": 0, "partial": 0, "shard_failures": 0}
+
+    @property
+    def n_shards(self) -> int:
+        return len(self.addresses)
+
+    def _checkout(self, shard: int) -> Connection:
+        with self._lock:
+            if self._idle[shard]:
+                return self._idle[shard].pop()
+        return self._connect(shard)
+
+    def _connect(self, shard: int) -> Connection:
+        """multiprocessing.connection.Client, but bounded by the timeout"""
+        sock = socket.create_connection(self.addresses[shard], timeout=self.timeout)
+        sock.setblocking(True)
+        conn = Connection(sock.detach())
+        try:
+            # Every handshake read and write is bounded, a shard that stalls
+            # midway must not block the query forever
+            _set_io_timeout(conn.fileno(), self.timeout)
+            if not conn.poll(self.timeout):
+                raise TimeoutError(f"Shard {shard} did not complete the handshake")
+            answer_challenge(conn, self.authkey)
+            deliver_challenge(conn, self.authkey)
+            # Replies are awaited with poll against the query deadline from here on
+            _set_io_timeout(conn.fileno(), None)
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    def _checkin(self, shard: int, conn: Connection):
+        with self._lock:
+            self._idle[shard].append(conn)
+
+    def _scatter(self, requests: Dict[int, tuple]) -> Tuple[Dict[int, Any], List[int]]:
+        """Send every request first, then collect replies until the shared deadline"""
+        deadline = time.monotonic() + self.timeout
+        pending, replies, missing = {}, {}, []
+
+        for shard, request in requests.items():
+            try:
+                conn = self._checkout(shard)
+                conn.send(request)
+                pending[shard] = conn
+            except (OSError, EOFError):
+                missing.append(shard)
+
+        for shard, conn in pending.items():
+            try:
+                if conn.poll(max(deadline - time.monotonic(), 0)):
+                    status, result = conn.recv()
+                    self._checkin(shard, conn)
+                    if status == "ok":
+                        replies[shard] = result
+                        continue
+                    print(f"Shard {shard} failed: {result}")
+                else:
+                    # A late reply would be read by the next request; drop the connection
+                    conn.close()
+            except (OSError, EOFError):
+                conn.close()
+            missing.append(shard)
+
+        with self._lock:
+            self.counters["queries"] += 1
+            self.counters["shard_failures"] += len(missing)
+            if missing:
+                self.counters["partial"] += 1
+        if missing and not self.allow_partial:
+            raise ShardUnavailable(sorted(missing))
+        return replies, sorted(missing)
+
+    @staticmethod
+    def _merge(replies: Dict[int, List[Tuple[tuple, Dict]]], n: int) -> List[Dict]:
+        """K-way merge of the per-shard sorted top-N lists; keys end with the global id"""
+        merged = heapq.merge(*replies.values(), key=lambda entry: entry[0])
+        return [record for _, record in itertools.islice(merged, n)]
+
+    def gather(self, method: str, n: int = 5, **kwargs) -> GatherResult:
+        """Run a rank_* filter method on every shard and merge the top `n`"""
+        if method not in RANK_ORDERS:
+            raise ValueError(f"Unknown rank method: {method}")
+        request = ("rank", (method, n, kwargs), {})
+        replies, missing = self._scatter({shard: request for shard in range(self.n_shards)})
+        return GatherResult(self._merge(replies, n), missing)
+
+    def _resolve(self, title: str) -> Tuple[Optional[Tuple[int, Any]], List[int]]:
+        replies, missing = self._scatter({shard: ("resolve", (title,), {}) for shard in range(self.n_shards)})
+        candidates = [candidate for candidate in replies.values() if candidate is not None]
+        if not candidates:
+            return None, missing
+        _, global_id, vector = min(candidates, key=lambda candidate: candidate[0])
+        return (global_id, vector), missing
+
+    def resolve_title(self, title: str) -> Optional[int]:
+        """Global id of the query title, resolved like NetflixRecommender.resolve_title"""
+        resolved, _ = self._resolve(title)
+        return resolved[0] if resolved is not None else None
+
+    def similar(self, title: str, n: int = 5) -> GatherResult:
+        resolved, missing = self._resolve(title)
+        if resolved is None:
+            return GatherResult([], missing)
+
+        idx, vector = resolved
+        request = ("similar", (vector, idx, n), {})
+        replies, failed = self._scatter({shard: request for shard in range(self.n_shards)})
+        return GatherResult(self._merge(replies, n), sorted(set(missing) | set(failed)))
+
+    def recommend_similar_content(self, title: str, n_recommendations: int = 5) -> List[Dict]:
+        return self.similar(title, n_recommendations).records
+
+    def recommend_by_director(self, director_name: str, n: int = 5) -> List[Dict]:
+        return self.gather("rank_by_director", n, director_name=director_name).records
+
+    def recommend_by_actor(self, actor_name: str, n: int = 5) -> List[Dict]:
+        return self.gather("rank_by_actor", n, actor_name=actor_name).records
+
+    def recommend_by_rating(self, rating: str, n_recommendations: int = 5) -> List[Dict]:
+        return self.gather("rank_by_rating", n_recommendations, rating=rating).records
+
+    def recommend_by_genre(self, genre: str, n_recommendations: int = 5) -> List[Dict]:
+        return self.gather("rank_by_genre", n_recommendations, genre=genre).records
+
+    def recommend_by_multi(self,
+                           genre: str = None,
+                           director: str = None,
+                           actor: str = None,
+                           rating: str = None,
+                           release_year: int = None,
+                           country: str = None,
+                           n_recommendations: int = 5) -> List[Dict]:
+        return self.gather("rank_by_multi", n_recommendations, genre=genre, director=director, actor=actor,
+                           rating=rating, release_year=release_year, country=country).records
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"shards": self.n_shards, "idle_connections": sum(map(len, self._idle)), **self.counters}
+
+    def close(self):
+        with self._lock:
+            for idle in self._idle:
+                for conn in idle:
+                    conn.close()
+                idle.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split the processed catalog into shards, or serve one shard")
+    parser.add_argument("--split", action="store_true",
+                        help="Write per-shard artifacts from the full processed catalog and exit")
+    parser.add_argument("--shard", type=int, help="Index of the shard to serve")
+    parser.add_argument("--shards", type=int, required=True, help="Total number of shards")
+    parser.add_argument("--shards-dir", default=SHARDS_DIR)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    args = parser.parse_args(argv)
+
+    if args.split:
+        manifest, contents = read_verified([CATALOG_CSV, TFIDF_MATRIX], PROCESSED_DIR)
+        movies_df = pd.read_csv(io.BytesIO(contents[CATALOG_CSV]))
+        tfidf_matrix = load_npz(io.BytesIO(contents[TFIDF_MATRIX]))
+        if tfidf_matrix.shape[0] != len(movies_df):
+            raise ArtifactMismatchError(f"{TFIDF_MATRIX} has {tfidf_matrix.shape[0]} rows but {CATALOG_CSV} has {len(movies_df)}")
+        run = manifest["run"] if manifest is not None else None
+        for path in publish_shards(movies_df, tfidf_matrix, args.shards, args.shards_dir, run):
+            print(f"Wrote {path}")
+        return
+
+    if args.shard is None:
+        parser.error("--shard is required to serve a shard")
+    authkey = os.environ.get(AUTHKEY_ENV, "").encode()
+    if not authkey:
+        parser.error(f"set {AUTHKEY_ENV}; shard requests are unpickled, so a node never runs without a secret key")
+
+    shard = load_shard(args.shard, args.shards, args.shards_dir)
+    server = ShardServer(shard, authkey, (args.host, args.port))
+    print(f"Shard {args.shard}/{args.shards} serving {shard.ping()} titles on {server.address}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
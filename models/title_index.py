@@ -0,0 +1,130 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher
+import numpy as np
+from collections import defaultdict
+from typing import Iterable, List, Optional, Set, Tuple
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace"""
+    text = unicodedata.normalize("NFKD", str(title)).encode("ascii", "ignore").decode("ascii")
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def trigrams(normalized: str) -> Set[str]:
+    """Character trigrams of each word, padded like pg_trgm ('  w', ' wo', 'wor', 'ord', 'rd ')"""
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TitleIndex:
+    """
+    Character-trigram inverted index over catalog titles
+
+    Built once at load time. A lookup only touches the postings of the query's
+    trigrams, so typos ("Stranger Thigns") and partial titles resolve in a few
+    milliseconds even for catalogs with 100k+ titles.
+    """
+
+    def __init__(self, titles: Iterable[str]):
+        self.normalized = [normalize_title(title) if isinstance(title, str) else "" for title in titles]
+
+        postings = defaultdict(list)
+        sizes = np.zeros(len(self.normalized), dtype=np.int32)
+        for title_id, normalized in enumerate(self.normalized):
+            grams = trigrams(normalized)
+            sizes[title_id] = len(grams)
+            for gram in grams:
+                postings[gram].append(title_id)
+
+        self.sizes = sizes
+        self.lengths = np.array([len(normalized) for normalized in self.normalized], dtype=np.int32)
+        self.postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def _shared_counts(self, grams: Set[str]) -> np.ndarray:
+        """Number of trigrams each title shares with `grams`"""
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return np.zeros(len(self.normalized), dtype=np.int64)
+        return np.bincount(np.concatenate(hits), minlength=len(self.normalized))
+
+    def search(self, query: str, limit: int = 5, threshold: float = 0.6,
+               candidates: int = 20) -> List[Tuple[int, float]]:
+        """
+        Title ids similar to `query`, best first
+
+        Trigram overlap picks the `candidates` closest titles, which are then
+        re-scored with a sequence similarity ratio so word order and small
+        typos weigh more than shared common words ("the").
+        """
+        normalized = normalize_title(query)
+        grams = trigrams(normalized)
+        if not grams:
+            return []
+
+        counts = self._shared_counts(grams)
+        ids = np.flatnonzero(counts)
+        shared = counts[ids]
+        jaccard = shared / (len(grams) + self.sizes[ids] - shared)
+        if len(ids) > candidates:
+            ids = ids[np.argpartition(-jaccard, candidates)[:candidates]]
+
+        scored = [(int(title_id), SequenceMatcher(None, normalized, self.normalized[title_id]).ratio())
+                  for title_id in ids]
+        scored = [match for match in scored if match[1] >= threshold]
+        # Best score first, ties in catalog order
+        scored.sort(key=lambda match: (-match[1], match[0]))
+        return scored[:limit]
+
+    def best_match(self, query: str, threshold: float = 0.6) -> Optional[int]:
+        """Id of the most similar title, or None if nothing reaches the threshold"""
+        matches = self.search(query, limit=1, threshold=threshold)
+        return matches[0][0] if matches else None
+
+    def find_in_text(self, text: str,
+                     limit: int = 5,
+                     threshold: float = 0.85,
+                     candidates: int = 20,
+                     min_length: int = 4) -> List[Tuple[int, float]]:
+        """
+        Titles mentioned in free text, allowing small typos
+
+        Titles with most of their trigrams present in the text are compared
+        against every run of the same number of words in the text; the best
+        ratio is the title's score. Matches covering more of the text come
+        first ("stranger things" before "stranger"). Titles shorter than
+        `min_length` characters are ignored because they collide with common
+        words ("Up", "You").
+        """
+        normalized = normalize_title(text)
+        grams = trigrams(normalized)
+        if not grams:
+            return []
+
+        counts = self._shared_counts(grams)
+        ids = np.flatnonzero(counts)
+        ids = ids[self.lengths[ids] >= min_length]
+        shared = counts[ids]
+        ids = ids[shared / self.sizes[ids] >= threshold - 0.25]
+        ids = ids[np.argsort(-counts[ids], kind='stable')[:candidates]]
+
+        words = normalized.split()
+        matches = []
+        for title_id in ids:
+            title = self.normalized[title_id]
+            width = min(len(title.split()), len(words))
+            score = max(
+                SequenceMatcher(None, title, " ".join(words[start:start + width])).ratio()
+                for start in range(len(words) - width + 1)
+            )
+            if score >= threshold:
+                matches.append((int(title_id), score))
+
+        matches.sort(key=lambda match: (-match[1] * self.lengths[match[0]], match[0]))
+        return matches[:limit]
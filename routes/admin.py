@@ -0,0 +1,48 @@
+import os
+import secrets
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from utils.profiling import ProfileSession, begin_session, end_session
+
+# The admin routes are only mounted when ADMIN_TOKEN is set (see main.py)
+ADMIN_TOKEN_ENV = "ADMIN_TOKEN"
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    expected = os.environ.get(ADMIN_TOKEN_ENV)
+    # compare_digest only accepts ASCII str, so compare bytes: any header value is then a plain mismatch
+    if not expected or not x_admin_token or not secrets.compare_digest(x_admin_token.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token.")
+
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin_token)])
+
+
+@router.post("/profile")
+async def profile_workers(mode: str = Query("sample", pattern="^(sample|cprofile|tracemalloc)$"),
+                          seconds: float = Query(10.0, gt=0, le=300),
+                          requests: Optional[int] = Query(None, ge=1),
+                          top: int = Query(30, ge=1, le=500),
+                          format: str = Query("json", pattern="^(json|collapsed)$")):
+    """
+    Profile live webhook traffic on this worker
+
+    Runs for `seconds`, or until `requests` webhook requests have finished if
+    that comes first. `format=collapsed` returns the sampled stacks prefixed
+    with their intent, ready for flamegraph tools (sample mode only).
+    """
+    session = ProfileSession(mode)
+    if format == "collapsed" and session.mode != "sample":
+        raise HTTPException(status_code=400, detail="Collapsed stacks are only available in sample mode.")
+    if not begin_session(session):
+        raise HTTPException(status_code=409, detail="A profiling session is already running.")
+
+    try:
+        await session.wait(seconds, requests)
+    finally:
+        end_session(session, top)
+
+    if format == "collapsed":
+        return PlainTextResponse(session.collapsed())
+    return session.report(top)
@@ -0,0 +1,173 @@
+import json
+import math
+from typing import Dict, Any, Iterator, Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from models.recommender import Catalog
+from routes.webhook import recommender
+from utils.cursor_store import CursorStore
+
+router = APIRouter(prefix="/recommendations")
+cursors = CursorStore()
+
+# Fields sent for each streamed item, enough for the browse UI
+ITEM_FIELDS = ["show_id", "type", "title", "director", "cast", "country",
+               "release_year", "rating", "duration", "listed_in", "description"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def rank_strategy(strategy: str,
+                  catalog: Catalog,
+                  title: Optional[str] = None,
+                  name: Optional[str] = None,
+                  genre: Optional[str] = None,
+                  rating: Optional[str] = None,
+                  director: Optional[str] = None,
+                  actor: Optional[str] = None,
+                  country: Optional[str] = None,
+                  release_year: Optional[int] = None):
+    """Rank `catalog` for one strategy, validating its required parameters"""
+    if strategy == "similar":
+        if not title:
+            raise HTTPException(status_code=400, detail="Please provide a movie or show title.")
+        return recommender.rank_similar_content(title, catalog)
+    if strategy == "director":
+        if not name:
+            raise HTTPException(status_code=400, detail="Please provide a director name.")
+        return recommender.rank_by_director(name, catalog)
+    if strategy == "actor":
+        if not name:
+            raise HTTPException(status_code=400, detail="Please provide an actor name.")
+        return recommender.rank_by_actor(name, catalog)
+    if strategy == "genre":
+        if not genre:
+            raise HTTPException(status_code=400, detail="Please specify a genre.")
+        return recommender.rank_by_genre(genre, catalog)
+    if strategy == "rating":
+        if not rating:
+            raise HTTPException(status_code=400, detail="Please specify a rating.")
+        return recommender.rank_by_rating(rating, catalog)
+    if strategy == "multi":
+        if not any([genre, director, actor, rating, country, release_year]):
+            raise HTTPException(status_code=400, detail="Please specify at least one criterion.")
+        return recommender.rank_by_multi(genre=genre, director=director, actor=actor,
+                                         rating=rating, release_year=release_year, country=country,
+                                         catalog=catalog)
+    raise HTTPException(status_code=404, detail=f"Unknown recommendation strategy '{strategy}'.")
+
+
+def to_item(record: Dict[str, Any], rank: int) -> Dict[str, Any]:
+    """Project a catalog row onto the streamed fields, replacing NaN with null"""
+    item = {"rank": rank}
+    for field in ITEM_FIELDS:
+        value = record.get(field)
+        item[field] = None if isinstance(value, float) and math.isnan(value) else value
+    return item
+
+
+def stream_items(positions, format: str, catalog: Catalog) -> Iterator[str]:
+    """Serialize ranked catalog rows one at a time as NDJSON lines or SSE events"""
+    count = 0
+    for count, record in enumerate(recommender.iter_records(positions, catalog=catalog), 1):
+        line = json.dumps(to_item(record, count), default=str)
+        if format == "sse":
+            yield f"event: item\ndata: {line}\n\n"
+        else:
+            yield line + "\n"
+
+    if format == "sse":
+        yield f"event: end\ndata: {json.dumps({'count': count})}\n\n"
+
+
+@router.get("/{strategy}/stream")
+def stream_recommendations(strategy: str,
+                           n: int = Query(20, ge=1, le=1000),
+                           format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+                           title: Optional[str] = None,
+                           name: Optional[str] = None,
+                           genre: Optional[str] = None,
+                           rating: Optional[str] = None,
+                           director: Optional[str] = None,
+                           actor: Optional[str] = None,
+                           country: Optional[str] = None,
+                           release_year: Optional[int] = None):
+    """Stream up to `n` ranked recommendations as NDJSON or Server-Sent Events"""
+    # Rows are read from the catalog the ranking was computed on, even across a reload
+    catalog = recommender.catalog
+    positions = rank_strategy(strategy, catalog, title=title, name=name, genre=genre, rating=rating,
+                              director=director, actor=actor, country=country, release_year=release_year)
+    return StreamingResponse(
+        stream_items(positions[:n], format, catalog),
+        media_type=MEDIA_TYPES[format],
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+def _parse_cursor(cursor: str):
+    token, _, offset = cursor.rpartition(".")
+    if not token or not offset.isdigit():
+        raise HTTPException(status_code=400, detail="Malformed cursor.")
+    return token, int(offset)
+
+
+def _query_scope(strategy: str, **query) -> tuple:
+    return strategy, tuple(sorted((name, value) for name, value in query.items() if value is not None))
+
+
+@router.get("/{strategy}")
+def paginate_recommendations(strategy: str,
+                             page_size: int = Query(10, ge=1, le=100),
+                             cursor: Optional[str] = None,
+                             title: Optional[str] = None,
+                             name: Optional[str] = None,
+                             genre: Optional[str] = None,
+                             rating: Optional[str] = None,
+                             director: Optional[str] = None,
+                             actor: Optional[str] = None,
+                             country: Optional[str] = None,
+                             release_year: Optional[int] = None):
+    """
+    Page through ranked recommendations
+
+    The first request ranks the catalog and caches the ranking under a cursor;
+    passing `next_cursor` back returns the following page without re-ranking.
+    A cursor only continues the query that created it. `total` counts every
+    match, while paging stops after the first `pageable` of them.
+    """
+    query = dict(title=title, name=name, genre=genre, rating=rating,
+                 director=director, actor=actor, country=country, release_year=release_year)
+    scope = _query_scope(strategy, **query)
+    catalog = recommender.catalog
+    if cursor:
+        token, offset = _parse_cursor(cursor)
+        stored = cursors.get(token)
+        if stored is None:
+            raise HTTPException(status_code=410, detail="Cursor expired, please start a new query.")
+        # The query parameters may be omitted when continuing, but must not change
+        if stored.scope[0] != strategy or (scope[1] and stored.scope != scope):
+            raise HTTPException(status_code=400, detail="Cursor belongs to a different query.")
+        if stored.version != catalog.version:
+            raise HTTPException(status_code=410, detail="The catalog was reloaded, please start a new query.")
+        ranked, total = stored.ranked, stored.total
+    else:
+        positions = rank_strategy(strategy, catalog, **query)
+        token, offset = cursors.put(positions, scope, catalog.version), 0
+        ranked, total = positions[:cursors.max_ids], len(positions)
+
+    page = ranked[offset:offset + page_size]
+    next_offset = offset + len(page)
+    return {
+        "items": [to_item(record, rank) for rank, record in enumerate(recommender.records(page, catalog), offset + 1)],
+        "next_cursor": f"{token}.{next_offset}" if next_offset < len(ranked) else None,
+        "total": total,
+        "pageable": len(ranked),
+    }
+
+
+@router.get("/cursors/stats")
+def cursor_stats():
+    return cursors.stats()
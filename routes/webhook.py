@@ -1,125 +1,201 @@
-from fastapi import APIRouter
-from models.schemas import DialogflowRequest
-from models.recommender import NetflixRecommender
+from fastapi import APIRouter, Request
+from starlette.concurrency import run_in_threadpool
+from models.schemas import (DialogflowRequest, IntentParameters, SimilarContentParameters, DirectorParameters,
+                            ActorParameters, GenreParameters, RatingParameters, MultiParameters, TextParameters,
+                            parse_parameters)
+from models.recommender import NetflixRecommender, Catalog
 from utils.formatter import format_recommendations
-from typing import Dict, Any
+from utils.singleflight import SingleFlight, make_key
+from utils.admission import AdmissionController
+from utils.profiling import track_intent
+from utils.fast_json import FastJSONResponse, FulfillmentResponse, read_model
+from utils.session_store import SessionStore
+from scipy.sparse import csr_matrix
+from pydantic import ValidationError
+from typing import Any, Dict, List, Optional, Tuple
 
 router = APIRouter()
 recommender = NetflixRecommender()
 
-@router.post("/webhook")
-async def dialogflow_webhook(request: DialogflowRequest):
-    intent = request.queryResult.intent.displayName
-    parameters = request.queryResult.parameters
-    
+# Identical requests arriving together (e.g. a trending title) share one computation
+coalescer = SingleFlight()
+
+# Per-intent concurrency budgets; overloaded intents answer with a fallback in time
+admission = AdmissionController()
+
+# Per-session preference vectors used to re-rank later turns of a conversation
+sessions = SessionStore()
+
+# Precomputed answer for shed requests that have no cached answer yet
+BUSY_FALLBACK_TEXT = (
+    "We're getting a lot of requests right now, so here are some recent titles instead. "
+    + format_recommendations(recommender.records(recommender.rank_by_multi()[:5]), "recent titles")
+)
+
+def busy_fallback() -> Tuple[str, List[Dict]]:
+    return BUSY_FALLBACK_TEXT, []
+
+@router.post("/webhook", response_class=FulfillmentResponse)
+async def dialogflow_webhook(request: Request):
+    webhook_request = await read_model(request, DialogflowRequest)
+    intent = webhook_request.queryResult.intent.displayName
+    params = parse_parameters(intent, webhook_request.queryResult.parameters)
+    if params is None:
+        # Unknown intents cost nothing to answer and stay out of the per-intent state
+        return FulfillmentResponse(process_intent(intent, params)[0])
+    session_id = webhook_request.session
+    # One catalog snapshot for the whole request; a preference vector built on
+    # another catalog version is not used
+    catalog = recommender.catalog
+    preference = sessions.get(session_id, catalog.version) if session_id else None
+    
+    key = request_key(intent, params)
+    if preference is not None:
+        # A personalized answer is only shared within its own session
+        key = (key, session_id)
     try:
-        response_text = process_intent(intent, parameters)
+        response_text, touched = await coalescer.do(key, lambda: admission.run(
+            intent,
+            key,
+            compute=lambda: run_in_threadpool(process_intent, intent, params, preference, catalog),
+            fallback=busy_fallback
+        ))
     except Exception as e:
-        response_text = f"Sorry, an error occurred: {str(e)}"
-    
-    return {
-        "fulfillmentText": response_text,
-        "fulfillmentMessages": [
-            {
-                "text": {
-                    "text": [response_text]
-                }
-            }
-        ]
-    }
-
-def process_intent(intent: str, parameters: Dict[str, Any]) -> str:
-    intent_processors = {
-        "recommend_similar_content": process_similar_content,
-        "recommend_by_director": process_director_recommendation,
-        "recommend_by_actor": process_actor_recommendation,
-        "recommend_by_genre": process_genre_recommendation,
-        "recommend_by_multi": process_multi_recommendation,
-        "recommend_by_text": process_text_recommendation
-    }
-    
-    processor = intent_processors.get(intent)
-    if processor:
-        return processor(parameters)
-    return "Sorry, we couldn't find the requested recommendation feature."
-
-def process_similar_content(parameters: Dict[str, Any]) -> str:
-    title = parameters.get("title")
-    if isinstance(title, list):
-        title = title[0] if title else ""
+        response_text, touched = f"Sorry, an error occurred: {str(e)}", []
+    
+    if session_id and touched:
+        # A coalesced answer may come from another snapshot; show ids map it onto this one
+        positions = recommender.positions_of(touched, catalog)
+        sessions.update(session_id, catalog.tfidf_matrix[positions], catalog.version)
+    
+    return FulfillmentResponse(response_text)
+
+def request_key(intent: str, params: Optional[IntentParameters]):
+    return make_key(intent, params.model_dump(exclude_none=True) if params is not None else {})
+
+def warm_up(payloads: List[Dict[str, Any]]) -> int:
+    """
+    Answer recorded queries once before serving traffic
+
+    Seeds the admission fallback cache, so requests shed under load get a
+    real answer for the hottest queries instead of the generic one. Normal
+    requests are still computed on arrival; this caches nothing for them.
+    """
+    warmed = 0
+    for payload in payloads:
+        try:
+            webhook_request = DialogflowRequest.model_validate(payload)
+        except ValidationError:
+            continue
+        intent = webhook_request.queryResult.intent.displayName
+        params = parse_parameters(intent, webhook_request.queryResult.parameters)
+        if params is None:
+            continue
+        admission.prime(request_key(intent, params), process_intent(intent, params))
+        warmed += 1
+    return warmed
+
+@router.get("/webhook/stats", response_class=FastJSONResponse)
+def webhook_stats():
+    return {"coalescing": coalescer.stats(), "admission": admission.stats(), "sessions": sessions.stats()}
+
+def process_intent(intent: str,
+                   params: Optional[IntentParameters],
+                   preference: Optional[csr_matrix] = None,
+                   catalog: Optional[Catalog] = None) -> Tuple[str, List[Dict]]:
+    """Response text and the records of the titles it returned or referenced"""
+    processor = INTENT_PROCESSORS.get(intent)
+    if processor and params is not None:
+        with track_intent(intent):
+            return processor(params, preference, recommender.catalog if catalog is None else catalog)
+    return "Sorry, we couldn't find the requested recommendation feature.", []
+
+def process_similar_content(params: SimilarContentParameters,
+                            preference: Optional[csr_matrix],
+                            catalog: Catalog) -> Tuple[str, List[Dict]]:
+    title = params.title
     
     if not title:
-        return "Please provide a movie or show title."
+        return "Please provide a movie or show title.", []
     
-    recommendations = recommender.recommend_similar_content(str(title))
+    # Resolved once: the same position feeds the ranking and the session update
+    idx = recommender.resolve_title(title, catalog)
+    recommendations = (recommender.recommend_similar_to(idx, preference=preference, catalog=catalog)
+                       if idx is not None else [])
     if not recommendations:
-        return f"Sorry, we couldn't find any content similar to '{title}'. Please try another title."
+        return f"Sorry, we couldn't find any content similar to '{title}'. Please try another title.", []
     
-    return format_recommendations(recommendations, f"Similar to '{title}'")
+    # The referenced title says as much about the user as the answers do
+    referenced = recommender.records([idx], catalog)
+    return format_recommendations(recommendations, f"Similar to '{title}'"), referenced + recommendations
 
-def process_director_recommendation(parameters: Dict[str, Any]) -> str:
+def process_director_recommendation(params: DirectorParameters,
+                                    preference: Optional[csr_matrix],
+                                    catalog: Catalog) -> Tuple[str, List[Dict]]:
     """Process director-based recommendation request"""
-    director = parameters.get("director_name", "")
-    if isinstance(director, list):
-        director = director[0] if director else ""
+    director = params.director_name
     
     if not director:
-        return "Please provide a director name."
+        return "Please provide a director name.", []
     
-    recommendations = recommender.recommend_by_director(str(director))
-    return format_recommendations(recommendations, f"Movies by Director {director}")
+    recommendations = recommender.recommend_by_director(director, preference=preference, catalog=catalog)
+    return format_recommendations(recommendations, f"Movies by Director {director}"), recommendations
 
-def process_actor_recommendation(parameters: Dict[str, Any]) -> str:
+def process_actor_recommendation(params: ActorParameters,
+                                 preference: Optional[csr_matrix],
+                                 catalog: Catalog) -> Tuple[str, List[Dict]]:
     """Process actor-based recommendation request"""
-    actor = parameters.get("cast_name", "")
-    if isinstance(actor, list):
-        actor = actor[0] if actor else ""
+    actor = params.cast_name
     
     if not actor:
-        return "Please provide an actor name."
+        return "Please provide an actor name.", []
     
-    recommendations = recommender.recommend_by_actor(str(actor))
-    return format_recommendations(recommendations, f"Movies starring {actor}")
+    recommendations = recommender.recommend_by_actor(actor, preference=preference, catalog=catalog)
+    return format_recommendations(recommendations, f"Movies starring {actor}"), recommendations
 
-def process_genre_recommendation(parameters: Dict[str, Any]) -> str:
+def process_rating_recommendation(params: RatingParameters,
+                                  preference: Optional[csr_matrix],
+                                  catalog: Catalog) -> Tuple[str, List[Dict]]:
+    """Process rating-based recommendation request"""
+    rating = params.rating
+    
+    if not rating:
+        return "Please specify a rating.", []
+    
+    recommendations = recommender.recommend_by_rating(rating, preference=preference, catalog=catalog)
+    return format_recommendations(recommendations, f"{rating} rated content"), recommendations
+
+def process_genre_recommendation(params: GenreParameters,
+                                 preference: Optional[csr_matrix],
+                                 catalog: Catalog) -> Tuple[str, List[Dict]]:
     """Process genre-based recommendation request"""
-    genre = parameters.get("genre")
-    if isinstance(genre, list):
-        genre = genre[0] if genre else ""
+    genre = params.genre
     
     if not genre:
-        return "Please specify a genre."
+        return "Please specify a genre.", []
     
-    recommendations = recommender.recommend_by_genre(str(genre))
-    return format_recommendations(recommendations, f"{genre} genre")
+    recommendations = recommender.recommend_by_genre(genre, preference=preference, catalog=catalog)
+    return format_recommendations(recommendations, f"{genre} genre"), recommendations
 
-def process_multi_recommendation(parameters: Dict[str, Any]) -> str:
+def process_multi_recommendation(params: MultiParameters,
+                                 preference: Optional[csr_matrix],
+                                 catalog: Catalog) -> Tuple[str, List[Dict]]:
     """Process multi-criteria recommendation request"""
-    # Handle parameters that might be lists
-    genre = parameters.get("genre")
-    director = parameters.get("director")
-    actor = parameters.get("actor")
-    rating = parameters.get("rating")
-    country = parameters.get("country")
-    
-    # Convert list parameters to strings if necessary
-    for param in [genre, director, actor, rating, country]:
-        if isinstance(param, list):
-            param = param[0] if param else None
-    
-    # Convert all parameters to strings if they exist
-    genre = str(genre) if genre else None
-    director = str(director) if director else None
-    actor = str(actor) if actor else None
-    rating = str(rating) if rating else None
-    country = str(country) if country else None
+    # List parameters are already unwrapped to their first value by MultiParameters
+    genre = params.genre
+    director = params.director
+    actor = params.actor
+    rating = params.rating
+    country = params.country
     
     recommendations = recommender.recommend_by_multi(
         genre=genre,
         director=director,
         actor=actor,
         rating=rating,
-        country=country
+        country=country,
+        preference=preference,
+        catalog=catalog
     )
     
     # Combine conditions into string
@@ -136,11 +212,23 @@ def process_multi_recommendation(parameters: Dict[str, Any]) -> str:
         conditions.append(f"Rating: {rating}")
     
     category = "Content matching the following criteria (" + ", ".join(conditions) + ")"
-    return format_recommendations(recommendations, category)
+    return format_recommendations(recommendations, category), recommendations
 
 # ... other processing functions ... 
-def process_text_recommendation(parameters):
-    user_input = parameters.get("text", "")
-    recommendations = recommender.recommend_by_ner(user_input)
+def process_text_recommendation(params: TextParameters,
+                                preference: Optional[csr_matrix],
+                                catalog: Catalog) -> Tuple[str, List[Dict]]:
+    user_input = params.text or ""
+    recommendations = recommender.recommend_by_ner(user_input, preference=preference, catalog=catalog)
     category = f'"{user_input}"'
-    return format_recommendations(recommendations, category)
\ No newline at end of file
+    return format_recommendations(recommendations, category), recommendations
+
+INTENT_PROCESSORS = {
+    "recommend_similar_content": process_similar_content,
+    "recommend_by_director": process_director_recommendation,
+    "recommend_by_actor": process_actor_recommendation,
+    "recommend_by_genre": process_genre_recommendation,
+    "recommend_by_rating": process_rating_recommendation,
+    "recommend_by_multi": process_multi_recommendation,
+    "recommend_by_text": process_text_recommendation
+}
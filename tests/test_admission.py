@@ -0,0 +1,55 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from utils.admission import AdmissionController, IntentBudget
+
+def make_compute(delay, answer="computed"):
+    async def compute():
+        await asyncio.sleep(delay)
+        return answer
+    return compute
+
+def fallback():
+    return "fallback"
+
+def test_queue_full_sheds_to_fallback():
+    controller = AdmissionController(budgets={"slow": IntentBudget(max_concurrency=1, max_queue=1)})
+
+    async def run():
+        return await asyncio.gather(*(controller.run("slow", i, make_compute(0.05), fallback) for i in range(3)))
+
+    assert asyncio.run(run()) == ["computed", "computed", "fallback"]
+    stats = controller.stats()["slow"]
+    assert stats["shed_queue_full"] == 1
+    assert stats["fallback_static"] == 1
+    assert stats["completed"] == 2
+
+def test_slow_request_returns_cached_answer():
+    controller = AdmissionController(slo_seconds=0.05)
+
+    async def run():
+        first = await controller.run("recommend_by_rating", "key", make_compute(0, "fresh"), fallback)
+        second = await controller.run("recommend_by_rating", "key", make_compute(0.2, "late"), fallback)
+        third = await controller.run("recommend_by_rating", "other", make_compute(0.2, "late"), fallback)
+        return first, second, third
+
+    assert asyncio.run(run()) == ("fresh", "fresh", "fallback")
+    stats = controller.stats()["recommend_by_rating"]
+    assert stats["shed_slow"] == 2
+    assert stats["fallback_cached"] == 1
+    assert stats["fallback_static"] == 1
+
+def test_unknown_intents_share_one_bucket():
+    controller = AdmissionController()
+
+    async def run():
+        return [await controller.run(f"made_up_{i}", i, make_compute(0), fallback) for i in range(50)]
+
+    assert asyncio.run(run()) == ["computed"] * 50
+    stats = controller.stats()
+    assert list(stats) == ["other"]
+    assert stats["other"]["completed"] == 50
@@ -0,0 +1,89 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import contextlib
+import io
+import glob
+import pandas as pd
+import pytest
+from data.data_preprocessing import main as preprocess, TFIDF_PARAMS
+from utils import artifacts
+from utils.artifacts import (verify_manifest, read_verified, load_manifest, stage_key, ArtifactMismatchError,
+                             CATALOG_CSV, TFIDF_MATRIX, TFIDF_VECTORIZER)
+
+RAW_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data/raw/netflix_titles.csv")
+ARTIFACTS = [CATALOG_CSV, TFIDF_MATRIX, TFIDF_VECTORIZER]
+
+@pytest.fixture
+def raw_csv(tmp_path):
+    path = tmp_path / "raw.csv"
+    pd.read_csv(RAW_CSV, nrows=40).to_csv(path, index=False)
+    return str(path)
+
+def run(raw_csv, output_dir, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        preprocess(raw_csv, str(output_dir), **kwargs)
+    return out.getvalue()
+
+def test_stage_key_depends_on_inputs_and_params():
+    key = stage_key("tfidf", 1, {"clean": "abc"}, {"max_features": 5000})
+    assert key == stage_key("tfidf", 1, {"clean": "abc"}, {"max_features": 5000})
+    assert key != stage_key("tfidf", 1, {"clean": "abc"}, {"max_features": 3000})
+    assert key != stage_key("tfidf", 2, {"clean": "abc"}, {"max_features": 5000})
+    assert key != stage_key("tfidf", 1, {"clean": "abd"}, {"max_features": 5000})
+
+def test_unchanged_stages_are_skipped(raw_csv, tmp_path):
+    output_dir = tmp_path / "processed"
+    assert "unchanged" not in run(raw_csv, output_dir)
+    first = load_manifest(str(output_dir))
+
+    log = run(raw_csv, output_dir, tfidf_params={**TFIDF_PARAMS, "max_features": 100})
+    assert "clean: unchanged" in log and "features: unchanged" in log and "tfidf: unchanged" not in log
+    second = load_manifest(str(output_dir))
+    assert second["artifacts"][CATALOG_CSV]["sha256"] == first["artifacts"][CATALOG_CSV]["sha256"]
+    assert second["artifacts"][TFIDF_MATRIX]["key"] != first["artifacts"][TFIDF_MATRIX]["key"]
+
+    log = run(raw_csv, output_dir)
+    assert log.count("unchanged (") == 3
+    assert len(glob.glob(str(output_dir / "cache" / "tfidf-*.npz"))) == 2
+
+def test_verify_manifest_rejects_artifacts_from_another_run(raw_csv, tmp_path, caplog):
+    output_dir = tmp_path / "processed"
+    run(raw_csv, output_dir)
+    assert verify_manifest(ARTIFACTS, str(output_dir))["run"]
+
+    # A matrix from a different run copied over the published one
+    other_dir = tmp_path / "other"
+    run(raw_csv, other_dir, tfidf_params={**TFIDF_PARAMS, "max_features": 50})
+    (output_dir / TFIDF_MATRIX).write_bytes((other_dir / TFIDF_MATRIX).read_bytes())
+    with pytest.raises(ArtifactMismatchError):
+        verify_manifest(ARTIFACTS, str(output_dir))
+
+    (output_dir / "manifest.json").unlink()
+    with caplog.at_level("WARNING", logger="utils.artifacts"):
+        assert verify_manifest(ARTIFACTS, str(output_dir)) is None
+    assert "cannot verify" in caplog.text
+
+def test_read_verified_parses_only_the_checked_bytes(raw_csv, tmp_path, monkeypatch):
+    output_dir, other_dir = tmp_path / "processed", tmp_path / "other"
+    run(raw_csv, output_dir)
+    run(raw_csv, other_dir, tfidf_params={**TFIDF_PARAMS, "max_features": 50})
+    manifest, contents = read_verified(ARTIFACTS, str(output_dir))
+    assert contents[TFIDF_MATRIX] == (output_dir / TFIDF_MATRIX).read_bytes()
+
+    # Another run publishes after the manifest was read but before the files were
+    stale = load_manifest(str(output_dir))
+    for name in ARTIFACTS + ["manifest.json"]:
+        (output_dir / name).write_bytes((other_dir / name).read_bytes())
+    reads = []
+    def load_once_stale(directory):
+        reads.append(directory)
+        return stale if len(reads) == 1 else load_manifest(directory)
+    monkeypatch.setattr(artifacts, "load_manifest", load_once_stale)
+
+    manifest, contents = read_verified(ARTIFACTS, str(output_dir))
+    assert manifest["run"] != stale["run"]
+    assert contents[TFIDF_MATRIX] == (other_dir / TFIDF_MATRIX).read_bytes()
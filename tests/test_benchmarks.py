@@ -0,0 +1,48 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from benchmarks.payloads import load_catalog_vocabulary, generate_payloads, PARAMETER_BUILDERS
+from benchmarks.stats import summarize, find_regressions
+from models.schemas import DialogflowRequest
+
+CATALOG = pd.DataFrame({
+    "title": ["Stranger Things", "The Irishman", "Dick Johnson Is Dead"],
+    "cast": ["winona ryder, david harbour", "robert de niro, al pacino", "unknown cast"],
+    "director": ["unknown director", "martin scorsese", "kirsten johnson"],
+    "listed_in": ["tv dramas, tv horror", "crime movies, dramas", "documentaries"],
+    "rating": ["TV-14", "R", "PG-13"],
+    "country": ["united states", "united states", "unknown country"],
+})
+
+def test_vocabulary_skips_placeholders():
+    vocab = load_catalog_vocabulary(CATALOG)
+    assert "unknown cast" not in vocab["actor"]
+    assert "unknown director" not in vocab["director"]
+    assert "al pacino" in vocab["actor"]
+    assert "tv horror" in vocab["genre"]
+
+def test_payloads_cover_every_intent():
+    payloads = generate_payloads(load_catalog_vocabulary(CATALOG), 2 * len(PARAMETER_BUILDERS))
+    intents = [DialogflowRequest(**p).queryResult.intent.displayName for p in payloads]
+    assert sorted(set(intents)) == sorted(PARAMETER_BUILDERS)
+    assert all(intents.count(intent) == 2 for intent in PARAMETER_BUILDERS)
+
+def test_summarize_percentiles():
+    stats = summarize([i / 1000 for i in range(1, 101)])
+    assert stats["count"] == 100
+    assert stats["p50_ms"] == 50.5
+    assert stats["max_ms"] == 100.0
+    assert summarize([])["count"] == 0
+
+def test_find_regressions():
+    baseline = {"microbenchmarks": {"recommend_by_genre": {"p50_ms": 10.0}},
+                "webhook": [{"mode": "in-process", "concurrency": 8, "latency": {"p50_ms": 20.0}}]}
+    report = {"microbenchmarks": {"recommend_by_genre": {"p50_ms": 14.0}},
+              "webhook": [{"mode": "in-process", "concurrency": 8, "latency": {"p50_ms": 21.0}}]}
+    regressions = find_regressions(report, baseline, max_regression=0.25)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("microbenchmarks.recommend_by_genre")
@@ -0,0 +1,68 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from models.recommender import NetflixRecommender
+from utils.session_store import SessionStore
+
+def make_catalog(prefix, n):
+    # Catalogs of different sizes, so a position from one lands on another title in the other
+    df = pd.DataFrame({
+        "show_id": [f"{prefix}{i}" for i in range(n)],
+        "title": [f"{prefix} Title {i}" for i in range(n)],
+        "type": "Movie",
+        "director": [f"director {i % 3}" for i in range(n)],
+        "cast": [f"actor {i % 4}" for i in range(n)],
+        "country": "france",
+        "release_year": [2000 + i for i in range(n)],
+        "rating": [["R", "PG"][i % 2] for i in range(n)],
+        "listed_in": "dramas",
+        "genres": "['dramas']",
+        "description": [f"story number {i} {prefix}" for i in range(n)],
+    })
+    return df, TfidfVectorizer().fit_transform(df["description"])
+
+def test_calls_never_mix_catalogs_during_reloads():
+    recommender = NetflixRecommender.from_frames(*make_catalog("A", 40), similarity=False)
+    catalogs = [recommender.catalog, recommender._build_catalog(*make_catalog("B", 90), None, similarity=False, extractor=False)]
+    stop = threading.Event()
+
+    def reload_loop():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            recommender._load_catalog = lambda: catalogs[i % 2]
+            recommender.reload_catalog()
+
+    reloader = threading.Thread(target=reload_loop)
+    reloader.start()
+    try:
+        for _ in range(300):
+            results = recommender.recommend_by_multi(rating="R", director="director 1", n_recommendations=10)
+            prefixes = {record["show_id"][0] for record in results}
+            assert len(prefixes) == 1
+            assert all(record["rating"] == "R" and record["director"] == "director 1" for record in results)
+    finally:
+        stop.set()
+        reloader.join()
+
+def test_snapshot_keeps_positions_valid_after_reload():
+    recommender = NetflixRecommender.from_frames(*make_catalog("A", 40), similarity=False)
+    catalog = recommender.catalog
+    positions = recommender.rank_by_rating("R", catalog)
+
+    recommender._load_catalog = lambda: recommender._build_catalog(*make_catalog("B", 90), None, similarity=False, extractor=False)
+    reloaded = recommender.reload_catalog()
+    assert reloaded.version != catalog.version and recommender.catalog is reloaded
+    assert all(record["show_id"].startswith("A") for record in recommender.records(positions, catalog))
+
+    # A session vector built on the old catalog is not applied to the new one
+    store = SessionStore()
+    store.update("s1", catalog.tfidf_matrix[positions[:2]], catalog.version)
+    assert store.get("s1", catalog.version) is not None
+    assert store.get("s1", reloaded.version) is None
@@ -0,0 +1,62 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from scipy.sparse import random as sparse_random
+from sklearn.preprocessing import normalize
+from models.clustering import fit_clusters, save_clusters, ClusterIndex
+
+def make_matrix(n_rows=300, n_features=80):
+    return normalize(sparse_random(n_rows, n_features, density=0.05, format="csr", random_state=0))
+
+def test_fit_clusters_on_sparse_input():
+    X = make_matrix()
+    clusters = fit_clusters(X, n_clusters=6, n_components=10, silhouette_sample=100)
+    assert clusters["labels"].shape == (300,)
+    assert clusters["centroids"].shape == (6, 80)
+    assert -1.0 <= clusters["silhouette"] <= 1.0
+
+def test_cluster_index_candidates(tmp_path):
+    X = make_matrix()
+    clusters = fit_clusters(X, n_clusters=6, n_components=10)
+    path = str(tmp_path / "clusters.npz")
+    save_clusters(clusters, path)
+
+    assert ClusterIndex.load(path, n_rows=299) is None
+    index = ClusterIndex.load(path, n_rows=300)
+    candidates = index.candidates(X[0], n_probe=2)
+    assert np.all(np.diff(candidates) > 0)
+    assert set(np.flatnonzero(index.labels == index.labels[0])) <= set(candidates)
+
+def test_cluster_index_rejects_clusters_fit_on_another_matrix(tmp_path):
+    X = make_matrix()
+    path = str(tmp_path / "clusters.npz")
+    save_clusters(fit_clusters(X, n_clusters=6, n_components=10), path)
+
+    assert ClusterIndex.load(path, n_rows=300, tfidf_matrix=X) is not None
+    # Same row count, different contents
+    other = make_matrix().tolil()
+    other[0, 0] = 1.0
+    assert ClusterIndex.load(path, n_rows=300, tfidf_matrix=other.tocsr()) is None
+
+def test_large_catalog_without_clusters_scores_per_query(monkeypatch, caplog):
+    import pandas as pd
+    import models.recommender as recommender_module
+    from models.recommender import NetflixRecommender
+
+    X = make_matrix()
+    df = pd.DataFrame({"show_id": [f"s{i}" for i in range(300)], "title": [f"Title {i}" for i in range(300)],
+                       "type": "Movie", "director": "someone", "cast": "someone", "country": "france",
+                       "release_year": 2000, "rating": "R", "listed_in": "dramas", "genres": "['dramas']"})
+    dense = NetflixRecommender.from_frames(df, X)
+
+    monkeypatch.setattr(recommender_module, "CLUSTER_MIN_CATALOG", 100)
+    monkeypatch.setattr(ClusterIndex, "load", classmethod(lambda cls, *args, **kwargs: None))
+    with caplog.at_level("WARNING", logger="models.recommender"):
+        sparse = NetflixRecommender.from_frames(df, X)
+    assert sparse.catalog.content_similarity is None and sparse.catalog.clusters is None
+    assert "No usable clusters" in caplog.text
+    assert list(sparse.rank_similar_to(5)) == list(dense.rank_similar_to(5))
@@ -0,0 +1,33 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import numpy as np
+from utils.cursor_store import CursorStore
+
+def test_put_and_get_caps_ranking():
+    store = CursorStore(max_ids=3)
+    token = store.put(np.array([7, 3, 9, 1]), scope=("genre", "comedies"))
+    cursor = store.get(token)
+    assert cursor.ranked.tolist() == [7, 3, 9]
+    assert cursor.total == 4
+    assert cursor.scope == ("genre", "comedies")
+    assert store.get("unknown") is None
+
+def test_capacity_evicts_oldest():
+    store = CursorStore(max_cursors=2)
+    first, second, third = (store.put([i]) for i in range(3))
+    assert store.get(first) is None
+    assert store.get(second).ranked.tolist() == [1]
+    assert store.get(third).ranked.tolist() == [2]
+    assert store.stats()["evicted"] == 1
+
+def test_ttl_expiry():
+    store = CursorStore(ttl_seconds=0.01)
+    token = store.put([1, 2])
+    time.sleep(0.02)
+    assert store.get(token) is None
+    assert store.stats()["expired"] == 1
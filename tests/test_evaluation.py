@@ -0,0 +1,52 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import evaluation.engine as engine_module
+from evaluation.engine import EvaluationEngine, load_ground_truth_jsonl
+from evaluation.metrics import reciprocal_rank, ndcg_at_k
+
+class CountingRecommender:
+    """Returns fixed titles and counts how often each query runs"""
+    def __init__(self):
+        self.calls = []
+
+    def recommend_similar_content(self, title, n_recommendations=5):
+        self.calls.append(title)
+        return [{"title": t} for t in ["A", "B", "C"][:n_recommendations]]
+
+def test_rank_metrics():
+    assert reciprocal_rank(["A", "B", "C"], ["B"], k=5) == 0.5
+    assert reciprocal_rank(["A", "B", "C"], ["Z"], k=5) == 0.0
+    assert ndcg_at_k(["A", "B"], ["A", "B"], k=5) == 1.0
+    assert ndcg_at_k(["B", "A"], ["A"], k=5) < 1.0
+    assert ndcg_at_k(["A", "B"], ["B"], k=1) == 0.0
+
+def test_shared_queries_run_once(monkeypatch):
+    recommender = CountingRecommender()
+    monkeypatch.setattr(engine_module, "_recommender", recommender)
+    engine = EvaluationEngine(workers=1, top_k=5)
+
+    small = {"recommend_similar_content": {"Q1": ["B"]}}
+    large = {"recommend_similar_content": {"Q1": ["B"], "Q2": ["Z"]}}
+    results = engine.evaluate_sets({"small": small, "large": large})
+
+    assert sorted(recommender.calls) == ["Q1", "Q2"]
+    assert results["small"].loc[0, "MRR"] == 0.5
+    assert results["large"].loc[0, "HitRate"] == 0.5
+
+def test_load_ground_truth_jsonl(tmp_path):
+    path = tmp_path / "ground_truth.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"strategy": "recommend_by_actor", "query": "Tom Hanks", "expected": ["Cast Away"]}),
+        "",
+        json.dumps({"strategy": "recommend_by_ner", "query": "anything", "expected": []}),
+    ]))
+    ground_truth = load_ground_truth_jsonl(str(path))
+    assert ground_truth == {
+        "recommend_by_actor": {"Tom Hanks": ["Cast Away"]},
+        "recommend_by_ner": {"anything": []},
+    }
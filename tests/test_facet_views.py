@@ -0,0 +1,40 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from models.facet_views import FacetViews
+
+CATALOG = pd.DataFrame({
+    "title": ["Bravo", "Alpha", "Charlie", "Delta"],
+    "type": ["Movie", "TV Show", "Movie", "Movie"],
+    "rating": ["TV-MA", "TV-MA", "PG", "TV-MA"],
+    "country": ["india", "united states", "india", "united kingdom"],
+    "release_year": [2020, 2020, 2021, 2019],
+    "genres": ["['dramas', ' comedies']", "['tv dramas']", "['comedies']", "['horror movies']"],
+})
+
+def test_views_are_presorted_by_year_then_title():
+    views = FacetViews(CATALOG)
+    assert views.order.tolist() == [2, 1, 0, 3]
+    assert views.view("rating", "TV-MA").tolist() == [1, 0, 3]
+    # Ratings match exactly, as the unindexed query did
+    assert views.view("rating", "tv-ma").tolist() == []
+    assert views.view("type", "Movie").tolist() == [2, 0, 3]
+    assert views.view("rating", "R").tolist() == []
+
+def test_matching_merges_views_in_global_order():
+    views = FacetViews(CATALOG)
+    assert views.matching("genre", "dramas").tolist() == [1, 0]
+    assert views.matching("genre", "comedies").tolist() == [2, 0]
+    assert views.matching("country", "united").tolist() == [1, 3]
+    assert views.intersect(views.view("rating", "TV-MA"), views.matching("country", "india")).tolist() == [0]
+
+def test_genre_and_country_match_like_the_unindexed_queries():
+    views = FacetViews(CATALOG)
+    # Substrings match case-insensitively and keep the leading space of ' comedies'
+    assert views.matching("genre", "Dramas").tolist() == [1, 0]
+    assert views.matching("genre", " comedies").tolist() == [0]
+    assert views.matching("country", "INDIA").tolist() == [2, 0]
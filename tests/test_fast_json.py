@@ -0,0 +1,47 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from models.schemas import DialogflowRequest, MultiParameters, parse_parameters
+import utils.fast_json as fast_json
+from utils.fast_json import FulfillmentResponse, read_model, render_fulfillment
+
+def test_parameters_unwrap_lists():
+    params = MultiParameters.model_validate({"genre": ["Comedies", "Dramas"], "country": [], "rating": "", "year": 2020})
+    assert params.genre == "Comedies"
+    assert params.country is None
+    assert params.rating is None
+    assert parse_parameters("recommend_by_rating", {"rating": ["R"]}).rating == "R"
+    assert parse_parameters("unknown_intent", {"rating": "R"}) is None
+
+def test_fulfillment_template_matches_response_dict():
+    text = 'Here are "Amélie" and\nPokémon'
+    expected = {"fulfillmentText": text, "fulfillmentMessages": [{"text": {"text": [text]}}]}
+    assert json.loads(render_fulfillment(text)) == expected
+
+def test_stdlib_fallback_encodes_the_same(monkeypatch):
+    text = 'Amélie "2001"\n'
+    encoded = render_fulfillment(text)
+    monkeypatch.setattr(fast_json, "orjson", None)
+    assert render_fulfillment(text) == encoded
+
+def test_read_model_rejects_invalid_body():
+    app = FastAPI()
+
+    @app.post("/webhook", response_class=FulfillmentResponse)
+    async def webhook(request: Request):
+        webhook_request = await read_model(request, DialogflowRequest)
+        return FulfillmentResponse(webhook_request.queryResult.intent.displayName)
+
+    client = TestClient(app)
+    ok = client.post("/webhook", json={"queryResult": {"intent": {"displayName": "recommend_by_rating"}, "parameters": {}}})
+    assert ok.status_code == 200
+    assert ok.json()["fulfillmentText"] == "recommend_by_rating"
+    assert ok.headers["content-type"] == "application/json"
+    assert client.post("/webhook", json={"queryResult": {}}).status_code == 422
+    assert client.post("/webhook", content=b"not json").status_code == 422
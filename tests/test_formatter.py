@@ -0,0 +1,22 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.formatter import format_recommendations
+
+def test_format_recommendations():
+    result = format_recommendations(
+        [{"title": "Squared Love", "release_year": 2021}, {"title": "Untitled", "release_year": ""}],
+        "comedy genre"
+    )
+    assert result == "Here are the recommended comedy genre:\n\n1. Squared Love (2021)\n2. Untitled\n"
+
+def test_format_fallback_header():
+    result = format_recommendations([
+        {"title": "No matching recommendations found.", "description": "Nothing matched.", "release_year": ""},
+        {"title": "Dramatic", "release_year": 2019},
+    ], "anything")
+    assert result == "Nothing matched.\n\n1. Dramatic (2019)\n"
+    assert format_recommendations([], "anything") == "Sorry, we couldn't find any anything."
@@ -0,0 +1,92 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routes.admin import router as admin_router, ADMIN_TOKEN_ENV
+from utils.profiling import ProfileSession, begin_session, end_session, track_intent
+
+def busy(seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        sum(range(1000))
+
+def test_sample_mode_groups_stacks_by_intent():
+    session = ProfileSession("sample", interval=0.001)
+    assert begin_session(session)
+    assert not begin_session(ProfileSession("sample"))
+    with track_intent("recommend_by_genre"):
+        busy(0.1)
+    end_session(session)
+
+    report = session.report()
+    assert report["requests_by_intent"] == {"recommend_by_genre": 1}
+    assert report["intents"]["recommend_by_genre"]["samples"] > 0
+    assert "test_profiling.py:busy" in session.collapsed()
+
+def test_cprofile_mode_merges_requests():
+    session = ProfileSession("cprofile")
+    begin_session(session)
+    for _ in range(2):
+        with track_intent("recommend_by_rating"):
+            busy(0.01)
+    end_session(session)
+
+    report = session.report(top=5)
+    assert report["requests"] == 2
+    assert "busy" in report["intents"]["recommend_by_rating"]
+
+def test_cprofile_mode_survives_concurrent_requests():
+    session = ProfileSession("cprofile")
+    begin_session(session)
+    barrier = threading.Barrier(3)
+    errors = []
+
+    def request():
+        try:
+            with track_intent("recommend_by_genre"):
+                barrier.wait()
+                busy(0.02)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=request) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    end_session(session)
+
+    report = session.report(top=50)
+    assert errors == []
+    assert report["requests"] == 3
+    # One request holds the profiler while the others overlap it
+    assert report["requests_skipped"] == 2
+    assert "busy" in report["intents"]["recommend_by_genre"]
+
+def test_collapsed_format_is_rejected_before_profiling(monkeypatch):
+    monkeypatch.setenv(ADMIN_TOKEN_ENV, "secret")
+    app = FastAPI()
+    app.include_router(admin_router)
+    client = TestClient(app)
+
+    started = time.monotonic()
+    response = client.post("/admin/profile", params={"mode": "cprofile", "seconds": 5, "format": "collapsed"},
+                           headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 400
+    assert time.monotonic() - started < 1
+
+def test_non_ascii_admin_token_is_rejected(monkeypatch):
+    monkeypatch.setenv(ADMIN_TOKEN_ENV, "secret")
+    app = FastAPI()
+    app.include_router(admin_router)
+    client = TestClient(app)
+
+    response = client.post("/admin/profile", params={"seconds": 1},
+                           headers={"X-Admin-Token": "s\xe9cret".encode("latin-1")})
+    assert response.status_code == 401
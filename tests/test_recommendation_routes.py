@@ -0,0 +1,73 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import pytest
+import spacy
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# The routes share the webhook's recommender, which needs the spaCy model
+try:
+    spacy.load("en_core_web_sm")
+except OSError:
+    pytest.skip("en_core_web_sm is not installed", allow_module_level=True)
+
+from routes.recommendations import router, cursors, rank_strategy, recommender
+
+@pytest.fixture(scope="module")
+def client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+def test_stream_ndjson_and_sse(client):
+    response = client.get("/recommendations/genre/stream", params={"genre": "comedies", "n": 3})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    items = [json.loads(line) for line in response.text.splitlines()]
+    assert [item["rank"] for item in items] == [1, 2, 3]
+    assert all("comed" in item["listed_in"].lower() for item in items)
+
+    response = client.get("/recommendations/genre/stream", params={"genre": "comedies", "n": 3, "format": "sse"})
+    events = response.text.strip().split("\n\n")
+    assert len(events) == 4 and events[-1] == 'event: end\ndata: {"count": 3}'
+
+    assert client.get("/recommendations/genre/stream").status_code == 400
+    assert client.get("/recommendations/unknown/stream").status_code == 404
+
+def test_pagination_reports_true_total_and_follows_cursor(client, monkeypatch):
+    monkeypatch.setattr(cursors, "max_ids", 12)
+    expected = rank_strategy("genre", recommender.catalog, genre="dramas")
+    assert len(expected) > 12
+
+    first = client.get("/recommendations/genre", params={"genre": "dramas", "page_size": 5}).json()
+    assert first["total"] == len(expected)
+    assert first["pageable"] == 12
+
+    titles, page = [], first
+    while True:
+        titles += [item["title"] for item in page["items"]]
+        if page["next_cursor"] is None:
+            break
+        page = client.get("/recommendations/genre", params={"cursor": page["next_cursor"], "page_size": 5}).json()
+    assert titles == [record["title"] for record in recommender.records(expected[:12])]
+
+def test_cursor_is_tied_to_its_query(client):
+    first = client.get("/recommendations/genre", params={"genre": "dramas", "page_size": 2}).json()
+    cursor = first["next_cursor"]
+
+    assert client.get("/recommendations/rating", params={"cursor": cursor}).status_code == 400
+    assert client.get("/recommendations/genre", params={"cursor": cursor, "genre": "comedies"}).status_code == 400
+    assert client.get("/recommendations/genre", params={"cursor": cursor, "genre": "dramas"}).status_code == 200
+    assert client.get("/recommendations/genre", params={"cursor": "unknown.2"}).status_code == 410
+    assert client.get("/recommendations/genre", params={"cursor": "garbage"}).status_code == 400
+
+def test_cursor_from_before_a_reload_is_gone(client):
+    scope = ("genre", (("genre", "dramas"),))
+    token = cursors.put(rank_strategy("genre", recommender.catalog, genre="dramas"), scope,
+                        version=recommender.catalog.version - 1)
+    response = client.get("/recommendations/genre", params={"cursor": f"{token}.2"})
+    assert response.status_code == 410
@@ -0,0 +1,63 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer
+from models.recommender import NetflixRecommender
+from utils.session_store import SessionStore
+
+def rows(*dense_rows):
+    return csr_matrix(np.array(dense_rows, dtype=float))
+
+def test_vector_is_normalized_and_bounded():
+    store = SessionStore(max_terms=3)
+    vector = store.update("s1", rows([0.5, 0.1, 0.0, 0.3, 0.2, 0.0], [0.4, 0.0, 0.3, 0.3, 0.0, 0.1]))
+    assert vector.nnz == 3
+    assert np.isclose(np.sqrt(vector.multiply(vector).sum()), 1.0)
+    assert sorted(vector.indices) == [0, 2, 3]
+    assert store.get("s1") is vector
+    assert store.get("unknown") is None
+
+def test_older_turns_fade():
+    store = SessionStore(decay=0.5)
+    store.update("s1", rows([1.0, 0.0]))
+    vector = store.update("s1", rows([0.0, 1.0])).toarray().ravel()
+    assert vector[1] > vector[0] > 0
+
+def test_sessions_expire_and_evict():
+    store = SessionStore(max_sessions=2, ttl_seconds=0.05)
+    store.update("a", rows([1.0]))
+    store.update("b", rows([1.0]))
+    store.get("a")
+    store.update("c", rows([1.0]))
+    # "b" was the least recently used
+    assert store.get("b") is None and store.get("a") is not None
+    time.sleep(0.06)
+    assert store.get("a") is None
+    stats = store.stats()
+    assert stats["evicted"] == 1 and stats["expired"] == 2
+
+def test_rerank_moves_preferred_titles_up():
+    descriptions = ["zombie heist", "space war", "space station crew", "family comedy", "zombie outbreak"]
+    df = pd.DataFrame({
+        "show_id": [f"s{i}" for i in range(5)],
+        "title": [f"Title {i}" for i in range(5)],
+        "type": "Movie", "rating": "R", "country": "france", "release_year": 2020,
+        "listed_in": "dramas", "genres": "['dramas']", "description": descriptions,
+    })
+    matrix = TfidfVectorizer().fit_transform(df["description"])
+    recommender = NetflixRecommender.from_frames(df, matrix, similarity=False)
+
+    store = SessionStore()
+    preference = store.update("s1", recommender.tfidf_matrix[recommender.positions_of([{"show_id": "s2"}])])
+    positions = np.arange(5)
+    reranked = recommender.rerank(positions, preference, weight=0.9)
+    assert reranked[0] == 2 and reranked[1] == 1
+    assert sorted(reranked) == list(positions)
+    assert list(recommender.rerank(positions, csr_matrix((1, 3)))) == list(positions)
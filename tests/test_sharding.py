@@ -0,0 +1,153 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import socket
+import threading
+import time
+import pandas as pd
+import pytest
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+from sklearn.feature_extraction.text import TfidfVectorizer
+from models.recommender import NetflixRecommender
+from models.sharding import (CatalogShard, ShardCoordinator, ShardServer, ShardUnavailable, partition,
+                             publish_shards, load_shard, start_local_shards, main, AUTHKEY_ENV)
+
+AUTHKEY = b"test-shards"
+
+WORDS = ["heist", "zombie", "space", "family", "comedy", "war", "romance", "detective", "school", "music"]
+
+def make_catalog(n=60):
+    rows = []
+    for i in range(n):
+        rows.append({
+            "show_id": f"s{i}",
+            "title": f"Title {i:02d}",
+            "type": "Movie" if i % 3 else "TV Show",
+            "director": f"director {i % 7}",
+            "cast": f"actor {i % 5}, actor {i % 11}",
+            "country": ["united states", "india", "france"][i % 3],
+            "release_year": 2000 + i % 9,
+            "rating": ["R", "PG-13", "TV-MA"][i % 3],
+            "listed_in": "comedies, dramas" if i % 2 else "documentaries",
+            "genres": str(["comedies", " dramas"] if i % 2 else ["documentaries"]),
+            "description": f"{WORDS[i % 10]} {WORDS[(i * 3) % 10]} {WORDS[(i * 7) % 10]} story",
+        })
+    df = pd.DataFrame(rows)
+    return df, TfidfVectorizer().fit_transform(df["description"])
+
+@pytest.fixture(scope="module")
+def cluster():
+    df, matrix = make_catalog()
+    servers = [ShardServer(CatalogShard(*part), AUTHKEY) for part in partition(df, matrix, 3)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    coordinator = ShardCoordinator([server.address for server in servers], AUTHKEY)
+    yield NetflixRecommender.from_frames(df, matrix), coordinator
+    coordinator.close()
+    for server in servers:
+        server.close()
+
+def titles(records):
+    return [record["title"] for record in records]
+
+def test_sharded_results_match_single_node(cluster):
+    single, sharded = cluster
+    for title in ["Title 03", "Title 42", "Titel 17"]:
+        assert titles(sharded.recommend_similar_content(title, 10)) == titles(single.recommend_similar_content(title, 10))
+    assert titles(sharded.recommend_by_director("director 2", 8)) == titles(single.recommend_by_director("director 2", 8))
+    assert titles(sharded.recommend_by_actor("actor 4", 8)) == titles(single.recommend_by_actor("actor 4", 8))
+    assert titles(sharded.recommend_by_rating("R", 12)) == titles(single.recommend_by_rating("R", 12))
+    assert titles(sharded.recommend_by_genre("comedy", 12)) == titles(single.recommend_by_genre("comedy", 12))
+    criteria = {"genre": "dramas", "country": "india", "n_recommendations": 12}
+    assert titles(sharded.recommend_by_multi(**criteria)) == titles(single.recommend_by_multi(**criteria))
+    assert sharded.stats()["partial"] == 0
+
+def test_unresponsive_shard_gives_partial_result():
+    df, matrix = make_catalog()
+    parts = partition(df, matrix, 2)
+    server = ShardServer(CatalogShard(*parts[0]), AUTHKEY)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Accepts connections but never answers
+    silent = Listener(("127.0.0.1", 0), authkey=AUTHKEY)
+    accepted = []
+    threading.Thread(target=lambda: accepted.append(silent.accept()), daemon=True).start()
+
+    coordinator = ShardCoordinator([server.address, silent.address], AUTHKEY, timeout=0.3)
+    result = coordinator.gather("rank_by_rating", 10, rating="R")
+    assert result.partial and result.missing == [1]
+    assert result.records and all(title in set(parts[0][0]["title"]) for title in titles(result.records))
+
+    coordinator.allow_partial = False
+    with pytest.raises(ShardUnavailable):
+        coordinator.gather("rank_by_rating", 10, rating="R")
+    coordinator.close()
+    server.close()
+    silent.close()
+
+def test_silent_peers_cannot_stall_handshakes():
+    df, matrix = make_catalog()
+    server = ShardServer(CatalogShard(*partition(df, matrix, 1)[0]), AUTHKEY)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # Connects to the shard and never says a word
+    idle = socket.create_connection(server.address)
+
+    # Sends the start of a challenge and stalls in the middle of the handshake
+    stalled = socket.create_server(("127.0.0.1", 0))
+    peers = []
+    def stall():
+        peer, _ = stalled.accept()
+        peers.append(peer)
+        peer.sendall(b"\x00\x00\x00\x40")
+    threading.Thread(target=stall, daemon=True).start()
+
+    coordinator = ShardCoordinator([server.address, stalled.getsockname()], AUTHKEY, timeout=0.5)
+    started = time.monotonic()
+    result = coordinator.gather("rank_by_rating", 5, rating="R")
+    assert result.missing == [1] and len(result.records) == 5
+    assert time.monotonic() - started < 2
+    coordinator.close()
+    server.close()
+    idle.close()
+    stalled.close()
+
+def test_local_shards_match_single_node():
+    df, matrix = make_catalog()
+    shards = start_local_shards(df, matrix, 2)
+    coordinator = shards.coordinator()
+    try:
+        single = NetflixRecommender.from_frames(df, matrix)
+        assert titles(coordinator.recommend_similar_content("Title 07", 8)) == titles(single.recommend_similar_content("Title 07", 8))
+        assert titles(coordinator.recommend_by_genre("dramas", 8)) == titles(single.recommend_by_genre("dramas", 8))
+        # The shards only accept the key generated for this call
+        assert len(shards.authkey) == 32
+        with pytest.raises(AuthenticationError):
+            ShardCoordinator(shards.addresses, AUTHKEY, timeout=0.5).gather("rank_by_rating", 5, rating="R")
+    finally:
+        coordinator.close()
+        shards.stop()
+
+def test_published_shards_load_only_their_partition(tmp_path):
+    df, matrix = make_catalog()
+    df.loc[df.index % 3 == 0, "director"] = None
+    publish_shards(df, matrix, 3, str(tmp_path))
+
+    shard = load_shard(0, 3, str(tmp_path))
+    movies_part, tfidf_part, global_ids = partition(df, matrix, 3)[0]
+    assert shard.ping() == len(movies_part)
+    assert list(shard.global_ids) == list(global_ids)
+    assert (shard.engine.tfidf_matrix != tfidf_part).nnz == 0
+    assert list(shard.engine.movies_df.columns) == list(df.columns)
+    # No title of shard 0 has a director; the dtype still comes from the full catalog
+    assert shard.engine.movies_df["director"].dtype == df["director"].dtype
+
+def test_shard_node_refuses_to_start_without_authkey(tmp_path, monkeypatch):
+    df, matrix = make_catalog()
+    publish_shards(df, matrix, 2, str(tmp_path))
+    monkeypatch.delenv(AUTHKEY_ENV, raising=False)
+    with pytest.raises(SystemExit):
+        main(["--shard", "0", "--shards", "2", "--shards-dir", str(tmp_path)])
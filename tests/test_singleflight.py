@@ -0,0 +1,51 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from utils.singleflight import SingleFlight, make_key
+
+def test_make_key_reads_parameters_like_the_processors():
+    assert make_key("recommend_by_genre", {"genre": "comedy"}) == make_key("recommend_by_genre", {"genre": ["comedy"]})
+    assert make_key("recommend_by_multi", {"genre": "dramas", "actor": ""}) == make_key("recommend_by_multi", {"genre": "dramas"})
+    assert make_key("recommend_by_multi", {"genre": "dramas", "actor": []}) == make_key("recommend_by_multi", {"genre": "dramas"})
+    assert make_key("recommend_by_genre", {"genre": "comedy"}) != make_key("recommend_by_genre", {"genre": "horror"})
+
+    # The processors match and echo these as given, so they must not coalesce
+    assert make_key("recommend_by_director", {"director_name": "Martin  Scorsese"}) != \
+        make_key("recommend_by_director", {"director_name": "Martin Scorsese"})
+    assert make_key("recommend_by_genre", {"genre": "Comedy"}) != make_key("recommend_by_genre", {"genre": "comedy"})
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    executions = []
+
+    async def compute():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        same = [flight.do("key", compute) for _ in range(5)]
+        other = flight.do("other", compute)
+        return await asyncio.gather(*same, other)
+
+    assert asyncio.run(run()) == ["result"] * 6
+    assert len(executions) == 2
+    assert flight.stats() == {"calls": 6, "executions": 2, "coalesced": 4, "in_flight": 0}
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.stats()["executions"] == 1
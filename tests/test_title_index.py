@@ -0,0 +1,29 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.title_index import TitleIndex, normalize_title
+
+TITLES = ["Stranger Things", "THE STRANGER", "Beyond Stranger Things", "The Irishman",
+          "Kill the Irishman", "Narcos: Mexico", "Up", None]
+
+def test_normalize_title():
+    assert normalize_title("Narcos: Mexico") == "narcos mexico"
+    assert normalize_title("  Amélie!! ") == "amelie"
+
+def test_search_tolerates_typos():
+    index = TitleIndex(TITLES)
+    assert index.best_match("Stranger Thigns") == 0
+    assert index.best_match("the irishmen") == 3
+    assert index.best_match("narcos mexcio") == 5
+    assert index.best_match("completely unrelated") is None
+
+def test_find_in_text():
+    index = TitleIndex(TITLES)
+    found = [title_id for title_id, _ in index.find_in_text("Can you suggest something similar to The Irishman?")]
+    assert found == [3]
+    found = [title_id for title_id, _ in index.find_in_text("I loved stranger thigns, what's up next?")]
+    assert found[0] == 0
+    assert 6 not in found
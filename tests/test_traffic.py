@@ -0,0 +1,130 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import glob
+import json
+import threading
+import time
+import httpx
+from fastapi import FastAPI, Request
+from benchmarks.payloads import build_payload
+from benchmarks.replay import replay, schedule
+from utils.traffic import TrafficRecorder, TrafficRecorderMiddleware, load_recorded, hottest_payloads
+
+def webhook_app(recorder=None):
+    app = FastAPI()
+
+    @app.post("/webhook")
+    async def webhook(request: Request):
+        payload = await request.json()
+        return {"fulfillmentText": payload["queryResult"]["intent"]["displayName"]}
+
+    if recorder is not None:
+        app.add_middleware(TrafficRecorderMiddleware, recorder=recorder)
+    return app
+
+def test_middleware_records_webhook_bodies(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path), sample_rate=1.0)
+    payloads = [build_payload("recommend_by_genre", {"genre": genre}) for genre in ["comedies", "dramas"]]
+
+    async def send():
+        transport = httpx.ASGITransport(app=webhook_app(recorder))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for payload in payloads:
+                response = await client.post("/webhook", json=payload)
+                assert response.json()["fulfillmentText"] == "recommend_by_genre"
+            await client.get("/docs")
+
+    asyncio.run(send())
+    recorder.close()
+    assert [payload for _, payload in load_recorded(str(tmp_path))] == payloads
+    assert recorder.stats()["recorded"] == 2
+
+def test_recorder_rotates_and_keeps_newest_files(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path), max_bytes=1, max_files=2)
+    for i in range(5):
+        recorder.record(f'{{"n": {i}}}'.encode(), received_at=1000.0 + i)
+    recorder.record(b"not json")
+    recorder.close()
+    assert len(glob.glob(str(tmp_path / "webhook-*.jsonl"))) == 2
+    assert [payload["n"] for _, payload in load_recorded(str(tmp_path))] == [3, 4]
+
+def test_recorder_redacts_session_and_free_text(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path))
+    payload = build_payload("recommend_by_text", {"text": "something like heat"})
+    sessions = ["projects/p/agent/sessions/alice", "projects/p/agent/sessions/alice", "projects/p/agent/sessions/bob"]
+    for session in sessions:
+        recorder.record(json.dumps(dict(payload, session=session, queryResult=dict(
+            payload["queryResult"], queryText="I loved heat, what else?"))).encode())
+    recorder.close()
+
+    recorded = [payload for _, payload in load_recorded(str(tmp_path))]
+    pseudonyms = [payload["session"] for payload in recorded]
+    assert not any("alice" in pseudonym or "bob" in pseudonym for pseudonym in pseudonyms)
+    # One conversation keeps one pseudonym, so replayed sessions stay apart
+    assert pseudonyms[0] == pseudonyms[1] != pseudonyms[2]
+    assert all("queryText" not in payload["queryResult"] for payload in recorded)
+    assert recorded[0]["queryResult"]["parameters"] == {"text": "something like heat"}
+
+    recorder = TrafficRecorder(str(tmp_path / "strict"), redact=["session", "queryResult.parameters.text"])
+    recorder.record(json.dumps(payload).encode())
+    recorder.close()
+    assert load_recorded(str(tmp_path / "strict"))[0][1]["queryResult"]["parameters"] == {}
+
+def test_recorder_survives_write_errors_and_closes_in_time(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path))
+    open_next = recorder._open_next
+    failures = [OSError(28, "No space left on device")]
+
+    def flaky_open_next():
+        if failures:
+            raise failures.pop()
+        open_next()
+
+    recorder._open_next = flaky_open_next
+    for i in range(3):
+        recorder.record(f'{{"n": {i}}}'.encode(), received_at=1000.0 + i)
+    recorder.close()
+    assert recorder.stats()["errors"] == 1
+    assert [payload["n"] for _, payload in load_recorded(str(tmp_path))] == [1, 2]
+
+    # A writer stuck on a full queue does not hang shutdown
+    stuck = threading.Event()
+    recorder = TrafficRecorder(str(tmp_path / "stuck"), queue_size=1)
+    recorder._write = lambda *args: stuck.wait()
+    for i in range(3):
+        recorder.record(b"{}")
+    started = time.monotonic()
+    recorder.close(timeout=0.2)
+    assert time.monotonic() - started < 1
+    stuck.set()
+
+def test_hottest_payloads_ranks_by_frequency():
+    comedy = build_payload("recommend_by_genre", {"genre": "Comedies"})
+    records = [(0, comedy), (1, build_payload("recommend_by_genre", {"genre": ["Comedies"]})),
+               (2, build_payload("recommend_by_rating", {"rating": "R"})), (3, {"unexpected": True})]
+    hottest = hottest_payloads(records)
+    assert hottest[0] == comedy
+    assert len(hottest) == 2
+
+def test_replay_schedule_and_run():
+    records = [(100.0, build_payload("recommend_by_rating", {"rating": "R"})),
+               (100.5, build_payload("recommend_by_genre", {"genre": "dramas"})),
+               (102.0, build_payload("recommend_by_rating", {"rating": "PG"}))]
+    assert schedule(records, speed=1.0) == [0.0, 0.5, 2.0]
+    assert schedule(records, speed=10.0) == [0.0, 0.05, 0.2]
+    assert schedule(records, rate=4) == [0.0, 0.25, 0.5]
+
+    async def run():
+        transport = httpx.ASGITransport(app=webhook_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await replay(client, records, speed=20.0)
+
+    result = asyncio.run(run())
+    assert result["errors"] == 0 and result["latency"]["count"] == 3
+    assert result["wall_time_s"] >= 0.1
+    assert sorted(result["per_intent"]) == ["recommend_by_genre", "recommend_by_rating"]
@@ -0,0 +1,39 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from utils.ttl_cache import TTLCache
+
+def test_fixed_ttl_evicts_in_insertion_order():
+    cache = TTLCache(max_entries=2, ttl_seconds=0.05)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    # Reads do not refresh: "a" is still the oldest
+    assert cache.get("a") is None and cache.get("b") == 2
+    time.sleep(0.06)
+    assert cache.get("b") is None and len(cache) == 0
+    assert cache.stats() == {"entries": 0, "max_entries": 2, "evicted": 1, "expired": 2}
+
+def test_sliding_ttl_keeps_recently_read_entries():
+    cache = TTLCache(max_entries=2, ttl_seconds=0.2, sliding=True)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1
+
+    for _ in range(3):
+        time.sleep(0.08)
+        assert cache.get("a") == 1
+    assert cache.get("c") is None
+
+def test_update_merges_with_the_live_value():
+    cache = TTLCache(max_entries=10, ttl_seconds=60)
+    assert cache.update("k", lambda value: (value or 0) + 1) == 1
+    assert cache.update("k", lambda value: (value or 0) + 1) == 2
+    assert cache.get("k") == 2
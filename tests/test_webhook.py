@@ -0,0 +1,43 @@
+import sys
+import os
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import spacy
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# The webhook's recommender needs the spaCy model
+try:
+    spacy.load("en_core_web_sm")
+except OSError:
+    pytest.skip("en_core_web_sm is not installed", allow_module_level=True)
+
+from routes.webhook import router, recommender, sessions
+
+def similar_content_payload(title, session=None):
+    payload = {"queryResult": {"intent": {"displayName": "recommend_similar_content"},
+                               "parameters": {"title": title}}}
+    if session is not None:
+        payload["session"] = session
+    return payload
+
+def test_similar_content_resolves_the_title_once(monkeypatch):
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    calls = []
+    resolve_title = recommender.resolve_title
+    monkeypatch.setattr(recommender, "resolve_title", lambda *args: calls.append(args) or resolve_title(*args))
+
+    response = client.post("/webhook", json=similar_content_payload("Stranger Things"))
+    assert "Similar to 'Stranger Things'" in response.json()["fulfillmentText"]
+    assert len(calls) == 1
+
+    calls.clear()
+    client.post("/webhook", json=similar_content_payload("Stranger Things", "projects/p/sessions/one"))
+    assert len(calls) == 1
+    assert sessions.get("projects/p/sessions/one", recommender.catalog.version) is not None
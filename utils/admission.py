@@ -0,0 +1,171 @@
+import asyncio
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Optional
+
+
+class IntentBudget(NamedTuple):
+    max_concurrency: int
+    max_queue: int
+
+
+# Intents answered from presorted facet views get wide budgets; full column
+# scans (director, cast) and spaCy parsing get narrow ones
+INTENT_BUDGETS = {
+    "recommend_by_rating": IntentBudget(max_concurrency=16, max_queue=64),
+    "recommend_by_genre": IntentBudget(max_concurrency=16, max_queue=64),
+    "recommend_by_director": IntentBudget(max_concurrency=8, max_queue=32),
+    "recommend_similar_content": IntentBudget(max_concurrency=8, max_queue=32),
+    "recommend_by_multi": IntentBudget(max_concurrency=8, max_queue=32),
+    "recommend_by_actor": IntentBudget(max_concurrency=4, max_queue=16),
+    "recommend_by_text": IntentBudget(max_concurrency=2, max_queue=8),
+}
+DEFAULT_BUDGET = IntentBudget(max_concurrency=4, max_queue=16)
+
+# Intent names come from the request body; every name without a budget of its
+# own shares this bucket, so clients cannot grow the per-intent state
+OTHER_INTENTS = "other"
+
+# Dialogflow gives up on a webhook after 5 seconds; answer before that
+DEFAULT_SLO_SECONDS = 4.0
+
+
+class _IntentState:
+    def __init__(self, budget: IntentBudget):
+        self.budget = budget
+        self.semaphore = asyncio.Semaphore(budget.max_concurrency)
+        self.waiting = 0
+        self.running = 0
+        # Exponentially weighted moving average of the compute time
+        self.latency_ewma: Optional[float] = None
+
+
+class AdmissionController:
+    """
+    Per-intent concurrency budgets with load shedding
+
+    A request is shed, and answered with a fallback, when its intent's queue
+    is full, when the observed latency predicts it would miss the SLO, or when
+    it actually runs past the SLO. The fallback is the last good answer for
+    the same request if one is cached, otherwise a precomputed static answer.
+    """
+
+    def __init__(self,
+                 budgets: Dict[str, IntentBudget] = None,
+                 default_budget: IntentBudget = DEFAULT_BUDGET,
+                 slo_seconds: float = DEFAULT_SLO_SECONDS,
+                 fallback_cache_size: int = 1024,
+                 ewma_alpha: float = 0.2):
+        self.budgets = INTENT_BUDGETS if budgets is None else budgets
+        self.default_budget = default_budget
+        self.slo_seconds = slo_seconds
+        self.fallback_cache_size = fallback_cache_size
+        self.ewma_alpha = ewma_alpha
+        self._states: Dict[str, _IntentState] = {}
+        self._answers: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.counters: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def bucket(self, intent: str) -> str:
+        return intent if intent in self.budgets else OTHER_INTENTS
+
+    def _state(self, bucket: str) -> _IntentState:
+        state = self._states.get(bucket)
+        if state is None:
+            state = _IntentState(self.budgets.get(bucket, self.default_budget))
+            self._states[bucket] = state
+        return state
+
+    def _remember(self, key: Hashable, answer: Any):
+        self._answers[key] = answer
+        self._answers.move_to_end(key)
+        while len(self._answers) > self.fallback_cache_size:
+            self._answers.popitem(last=False)
+
+    def prime(self, key: Hashable, answer: Any):
+        """Seed the fallback cache, e.g. with answers computed during warmup"""
+        self._remember(key, answer)
+
+    def _shed(self, intent: str, key: Hashable, reason: str, fallback: Callable[[], Any]) -> Any:
+        counters = self.counters[intent]
+        counters[f"shed_{reason}"] += 1
+        cached = self._answers.get(key)
+        if cached is not None:
+            counters["fallback_cached"] += 1
+            return cached
+        counters["fallback_static"] += 1
+        return fallback()
+
+    def _predicted_latency(self, state: _IntentState) -> float:
+        if state.latency_ewma is None:
+            return 0.0
+        # Requests ahead of us run in waves of max_concurrency
+        waves = (state.waiting + state.running) // state.budget.max_concurrency + 1
+        return state.latency_ewma * waves
+
+    def _finished(self, state: _IntentState, started: float, task: asyncio.Future):
+        state.running -= 1
+        state.semaphore.release()
+        if not task.cancelled() and task.exception() is None:
+            elapsed = time.monotonic() - started
+            if state.latency_ewma is None:
+                state.latency_ewma = elapsed
+            else:
+                state.latency_ewma += self.ewma_alpha * (elapsed - state.latency_ewma)
+
+    async def run(self,
+                  intent: str,
+                  key: Hashable,
+                  compute: Callable[[], Awaitable[Any]],
+                  fallback: Callable[[], Any]) -> Any:
+        """Run `compute` within the intent's budget, or return a fallback answer in time"""
+        intent = self.bucket(intent)
+        state = self._state(intent)
+        counters = self.counters[intent]
+        deadline = time.monotonic() + self.slo_seconds
+
+        if not state.semaphore.locked():
+            # A slot is free, so this returns without waiting
+            await state.semaphore.acquire()
+        else:
+            # Only queued requests are judged, so one slow outlier cannot shed an idle intent
+            if state.waiting >= state.budget.max_queue:
+                return self._shed(intent, key, "queue_full", fallback)
+            if self._predicted_latency(state) > self.slo_seconds:
+                return self._shed(intent, key, "slo_risk", fallback)
+
+            state.waiting += 1
+            try:
+                await asyncio.wait_for(state.semaphore.acquire(), timeout=max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                return self._shed(intent, key, "queue_timeout", fallback)
+            finally:
+                state.waiting -= 1
+
+        counters["admitted"] += 1
+        state.running += 1
+        started = time.monotonic()
+        # The slot is released when the work really finishes, even if we stop waiting for it
+        task = asyncio.ensure_future(compute())
+        task.add_done_callback(lambda done: self._finished(state, started, done))
+
+        try:
+            answer = await asyncio.wait_for(asyncio.shield(task), timeout=max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            return self._shed(intent, key, "slow", fallback)
+
+        counters["completed"] += 1
+        self._remember(key, answer)
+        return answer
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        stats = {}
+        for intent, state in self._states.items():
+            stats[intent] = {
+                "max_concurrency": state.budget.max_concurrency,
+                "max_queue": state.budget.max_queue,
+                "running": state.running,
+                "waiting": state.waiting,
+                "latency_ewma_ms": round(state.latency_ewma * 1000, 2) if state.latency_ewma else None,
+                **self.counters[intent],
+            }
+        return stats
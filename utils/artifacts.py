@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROCESSED_DIR = './data/processed'
+MANIFEST_NAME = 'manifest.json'
+
+# Published by data/data_preprocessing.py, read by NetflixRecommender
+CATALOG_CSV = 'processed_netflix_titles.csv'
+TFIDF_MATRIX = 'tfidf_matrix.npz'
+TFIDF_VECTORIZER = 'tfidf_vectorizer.joblib'
+
+
+class ArtifactMismatchError(RuntimeError):
+    """Processed artifacts that were not produced by the same preprocessing run"""
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def stage_key(stage: str, version: int, inputs: Dict[str, str], params: Dict[str, Any]) -> str:
+    """Content address of a stage output: a hash of its code version, inputs and parameters"""
+    description = {"stage": stage, "version": version, "inputs": inputs, "params": params}
+    return hashlib.sha256(json.dumps(description, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def load_manifest(directory: str = PROCESSED_DIR) -> Optional[Dict[str, Any]]:
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_manifest(manifest: Dict[str, Any], directory: str = PROCESSED_DIR):
+    """Replace the manifest atomically, so readers see the old or the new one, never half of each"""
+    path = os.path.join(directory, MANIFEST_NAME)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def verify_manifest(names: List[str], directory: str = PROCESSED_DIR) -> Optional[Dict[str, Any]]:
+    """
+    Check that the artifacts on disk are the ones the manifest recorded
+
+    Every artifact in a manifest comes from the same run, so matching digests
+    mean the files belong together. Returns None for artifacts from before the
+    manifest existed, which cannot be checked.
+    """
+    manifest = load_manifest(directory)
+    if manifest is None:
+        logger.warning("No %s in %s; cannot verify the processed artifacts belong together", MANIFEST_NAME, directory)
+        return None
+
+    for name in names:
+        _check_digest(manifest, name, file_digest(os.path.join(directory, name)))
+    return manifest
+
+
+def _check_digest(manifest: Dict[str, Any], name: str, digest: str):
+    entry = manifest["artifacts"].get(name)
+    if entry is None:
+        raise ArtifactMismatchError(f"{name} is not part of preprocessing run {manifest['run']}")
+    if digest != entry["sha256"]:
+        raise ArtifactMismatchError(
+            f"{name} does not match preprocessing run {manifest['run']}; rerun data/data_preprocessing.py"
+        )
+
+
+def read_verified(names: List[str], directory: str = PROCESSED_DIR,
+                  attempts: int = 3) -> Tuple[Optional[Dict[str, Any]], Dict[str, bytes]]:
+    """
+    Read the artifacts' bytes once and check those bytes against the manifest
+
+    Parse from the returned bytes, never by opening the files again: a run
+    publishing in between would otherwise pair files from different runs.
+    If the manifest changed while reading, a run was publishing, so the read
+    is retried up to `attempts` times.
+    """
+    for attempt in range(attempts):
+        manifest = load_manifest(directory)
+        contents = {}
+        for name in names:
+            with open(os.path.join(directory, name), 'rb') as f:
+                contents[name] = f.read()
+        if manifest is None:
+            logger.warning("No %s in %s; cannot verify the processed artifacts belong together",
+                           MANIFEST_NAME, directory)
+            return None, contents
+
+        try:
+            for name in names:
+                _check_digest(manifest, name, hashlib.sha256(contents[name]).hexdigest())
+        except ArtifactMismatchError:
+            if attempt + 1 < attempts and load_manifest(directory) != manifest:
+                continue
+            raise
+        return manifest, contents
@@ -0,0 +1,50 @@
+import secrets
+import numpy as np
+from typing import Dict, Hashable, NamedTuple, Optional
+from utils.ttl_cache import TTLCache
+
+
+class Cursor(NamedTuple):
+    ranked: np.ndarray
+    # The query the ranking answers; a cursor is only valid for that query
+    scope: Hashable
+    # Number of matches before the ranking was capped at max_ids
+    total: int
+    # Catalog version the positions index into
+    version: Hashable
+
+
+class CursorStore:
+    """
+    Bounded, TTL-evicted store of ranked result lists for cursor pagination
+
+    Each entry holds at most `max_ids` row positions as int32, so the store
+    never uses more than roughly max_cursors * max_ids * 4 bytes.
+    """
+
+    def __init__(self, max_cursors: int = 1000, ttl_seconds: float = 600.0, max_ids: int = 1000):
+        self.max_cursors = max_cursors
+        self.ttl_seconds = ttl_seconds
+        self.max_ids = max_ids
+        # A cursor expires ttl_seconds after it was created, however often it is read
+        self._cursors = TTLCache(max_cursors, ttl_seconds)
+
+    def put(self, positions, scope: Hashable = None, version: Hashable = None) -> str:
+        """Store a ranked list of row positions for the query `scope` and return its token"""
+        cursor = Cursor(np.asarray(positions[:self.max_ids], dtype=np.int32), scope, len(positions), version)
+        token = secrets.token_urlsafe(12)
+        self._cursors.put(token, cursor)
+        return token
+
+    def get(self, token: str) -> Optional[Cursor]:
+        """The cursor stored under a token, or None if unknown or expired"""
+        return self._cursors.get(token)
+
+    def stats(self) -> Dict[str, int]:
+        stats = self._cursors.stats()
+        return {
+            "cursors": stats["entries"],
+            "max_cursors": self.max_cursors,
+            "evicted": stats["evicted"],
+            "expired": stats["expired"],
+        }
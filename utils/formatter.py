@@ -6,13 +6,12 @@ def format_recommendations(recommendations: List[Dict], category: str) -> str:
         return f"Sorry, we couldn't find any {category}."
 
     if recommendations[0].get("title") == "No matching recommendations found.":
-        result = f"{recommendations[0].get('description', '')}\n\n"
+        header = f"{recommendations[0].get('description', '')}\n\n"
         recommendations = recommendations[1:]
     else:
-        result = f"Here are the recommended {category}:\n\n"
+        header = f"Here are the recommended {category}:\n\n"
 
-    for i, item in enumerate(recommendations, 1):
-        year = f" ({item['release_year']})" if item.get("release_year") else ""
-        result += f"{i}. {item['title']}{year}\n"
-
-    return result 
\ No newline at end of file
+    return header + "".join(
+        f"{i}. {item['title']}" + (f" ({item['release_year']})" if item.get("release_year") else "") + "\n"
+        for i, item in enumerate(recommendations, 1)
+    )
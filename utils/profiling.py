@@ -0,0 +1,235 @@
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional
+
+# Files whose allocations the tracemalloc mode reports
+TRACKED_FILES = ("models/recommender.py", "models/entity_extractor.py")
+
+# Thread id -> intent currently being processed on that thread
+_active_intents: Dict[int, str] = {}
+_session_lock = threading.Lock()
+_session: Optional["ProfileSession"] = None
+
+# Python 3.12+ allows one active cProfile profiler per process, so concurrent
+# requests take turns: whoever finds it busy runs unprofiled
+_cprofile_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _collapse(frame, max_depth: int = 64) -> str:
+    """Stack from the outermost to the innermost frame, in collapsed (flamegraph) format"""
+    labels = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class ProfileSession:
+    """
+    One profiling run over live webhook traffic
+
+    Modes:
+        sample: a background thread samples the stacks of threads processing
+                an intent (stdlib sys._current_frames); falls back to cProfile
+                where that is unavailable
+        cprofile: requests are profiled with cProfile, stats merged per intent;
+                  only one request is profiled at a time, requests arriving
+                  meanwhile are counted in `requests_skipped`
+        tracemalloc: allocations made while the session runs, attributed to
+                     lines in NetflixRecommender and EntityExtractor
+    """
+
+    def __init__(self, mode: str = "sample", interval: float = 0.005):
+        if mode == "sample" and not hasattr(sys, "_current_frames"):
+            mode = "cprofile"
+        self.mode = mode
+        self.interval = interval
+        self.requests_seen = 0
+        self.requests_skipped = 0
+        self.requests_by_intent: Counter = Counter()
+        self.samples: Dict[str, Counter] = defaultdict(Counter)
+        self.stats: Dict[str, pstats.Stats] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self.started_at = 0.0
+        self.duration = 0.0
+        self.allocations: List[Dict[str, Any]] = []
+
+    def start(self):
+        self.started_at = time.monotonic()
+        if self.mode == "sample":
+            self._sampler = threading.Thread(target=self._sample_loop, name="profile-sampler", daemon=True)
+            self._sampler.start()
+        elif self.mode == "tracemalloc":
+            tracemalloc.start(25)
+
+    def stop(self, top: int = 30):
+        self.duration = time.monotonic() - self.started_at
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+        if self.mode == "tracemalloc":
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self.allocations = top_allocation_sites(snapshot, top)
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self._stop.is_set():
+            frames = sys._current_frames()
+            for thread_id, intent in list(_active_intents.items()):
+                frame = frames.get(thread_id)
+                if frame is not None and thread_id != own_id:
+                    self.samples[intent][_collapse(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+    def _enable_profiler(self) -> Optional[cProfile.Profile]:
+        if not _cprofile_lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiling tool (a debugger, coverage) is active
+            _cprofile_lock.release()
+            return None
+        return profiler
+
+    @contextmanager
+    def profile_request(self, intent: str):
+        profiler = self._enable_profiler() if self.mode == "cprofile" else None
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                _cprofile_lock.release()
+            with self._lock:
+                self.requests_seen += 1
+                self.requests_by_intent[intent] += 1
+                if profiler is not None:
+                    if intent in self.stats:
+                        self.stats[intent].add(profiler)
+                    else:
+                        self.stats[intent] = pstats.Stats(profiler)
+                elif self.mode == "cprofile":
+                    self.requests_skipped += 1
+
+    async def wait(self, seconds: float, requests: Optional[int] = None):
+        """Profile for `seconds`, or until `requests` webhook requests finished if given first"""
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if requests is not None and self.requests_seen >= requests:
+                break
+            await asyncio.sleep(0.05)
+
+    def collapsed(self) -> str:
+        """Collapsed stacks prefixed with the intent, ready for flamegraph.pl or speedscope"""
+        lines = []
+        for intent, stacks in sorted(self.samples.items()):
+            for stack, count in stacks.most_common():
+                lines.append(f"{intent};{stack} {count}")
+        return "\n".join(lines) + "\n"
+
+    def report(self, top: int = 30) -> Dict[str, Any]:
+        report = {
+            "mode": self.mode,
+            "duration_s": round(self.duration, 3),
+            "requests": self.requests_seen,
+            "requests_by_intent": dict(self.requests_by_intent),
+        }
+        if self.mode == "sample":
+            report["intents"] = {
+                intent: {
+                    "samples": sum(stacks.values()),
+                    "top_stacks": [{"stack": stack, "samples": count} for stack, count in stacks.most_common(top)],
+                }
+                for intent, stacks in sorted(self.samples.items())
+            }
+        elif self.mode == "cprofile":
+            report["requests_skipped"] = self.requests_skipped
+            report["intents"] = {}
+            for intent, stats in sorted(self.stats.items()):
+                stream = io.StringIO()
+                stats.stream = stream
+                stats.sort_stats("cumulative").print_stats(top)
+                report["intents"][intent] = stream.getvalue()
+        else:
+            report["allocations"] = self.allocations
+        return report
+
+
+def top_allocation_sites(snapshot: tracemalloc.Snapshot, top: int = 30) -> List[Dict[str, Any]]:
+    """
+    Group live allocations by the innermost frame inside the tracked files
+
+    Most memory is allocated deep inside pandas or spaCy; attributing it to the
+    recommender or extractor line that triggered it is what makes it actionable.
+    """
+    sites: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+    for trace in snapshot.traces:
+        # Frames are ordered from the most recent call
+        for frame in trace.traceback:
+            if frame.filename.replace(os.sep, "/").endswith(TRACKED_FILES):
+                site = sites[f"{frame.filename}:{frame.lineno}"]
+                site[0] += trace.size
+                site[1] += 1
+                break
+
+    ranked = sorted(sites.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return [{"site": site, "size_kib": round(size / 1024, 1), "count": count} for site, (size, count) in ranked]
+
+
+def current_session() -> Optional[ProfileSession]:
+    return _session
+
+
+def begin_session(session: ProfileSession) -> bool:
+    """Install a session unless another one is running"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            return False
+        _session = session
+    session.start()
+    return True
+
+
+def end_session(session: ProfileSession, top: int = 30):
+    global _session
+    with _session_lock:
+        if _session is session:
+            _session = None
+    session.stop(top)
+
+
+@contextmanager
+def track_intent(intent: str):
+    """Mark the current thread as processing `intent` for the active profiling session"""
+    thread_id = threading.get_ident()
+    _active_intents[thread_id] = intent
+    session = _session
+    try:
+        if session is None:
+            yield
+        else:
+            with session.profile_request(intent):
+                yield
+    finally:
+        _active_intents.pop(thread_id, None)
@@ -0,0 +1,66 @@
+import numpy as np
+from typing import Dict, Hashable, Optional
+from scipy.sparse import csr_matrix
+from utils.ttl_cache import TTLCache
+
+
+class SessionStore:
+    """
+    Bounded, TTL-evicted per-session preference vectors
+
+    A session's vector is a sparse TF-IDF profile of the titles its turns
+    returned or referenced: every update fades the old profile by `decay`,
+    adds the mean of the new rows, keeps the `max_terms` heaviest terms and
+    L2-normalizes, so a vector never holds more than `max_terms` entries.
+    Sessions idle for `ttl_seconds` expire; beyond `max_sessions` the least
+    recently used one is evicted. A vector is only valid for the catalog
+    `version` it was built on; after a reload the session starts over.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 1800.0,
+                 max_terms: int = 200, decay: float = 0.7):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_terms = max_terms
+        self.decay = decay
+        # Sessions expire ttl_seconds after their last turn; entries are (vector, version)
+        self._sessions = TTLCache(max_sessions, ttl_seconds, sliding=True)
+
+    def get(self, session_id: str, version: Hashable = None) -> Optional[csr_matrix]:
+        """The session's preference vector (1 x vocabulary), or None if it has none for this catalog version"""
+        entry = self._sessions.get(session_id)
+        if entry is None or entry[1] != version:
+            return None
+        return entry[0]
+
+    def _compact(self, vector: csr_matrix) -> csr_matrix:
+        if vector.nnz > self.max_terms:
+            keep = np.argpartition(vector.data, -self.max_terms)[-self.max_terms:]
+            vector = csr_matrix((vector.data[keep], (np.zeros(len(keep), dtype=np.int32), vector.indices[keep])),
+                                shape=vector.shape)
+        norm = np.sqrt(vector.multiply(vector).sum())
+        return vector / norm if norm > 0 else vector
+
+    def update(self, session_id: str, rows: csr_matrix, version: Hashable = None) -> Optional[csr_matrix]:
+        """Fold the TF-IDF rows of the titles one turn returned or referenced into the session"""
+        if rows.shape[0] == 0:
+            return self.get(session_id, version)
+        # Mean of the rows as a sparse product, never densifying the vocabulary
+        turn = csr_matrix(np.full((1, rows.shape[0]), 1.0 / rows.shape[0])) @ rows
+
+        def merge(entry):
+            vector = turn
+            if entry is not None and entry[1] == version and entry[0].shape == turn.shape:
+                vector = self.decay * entry[0] + turn
+            return self._compact(csr_matrix(vector)), version
+
+        return self._sessions.update(session_id, merge)[0]
+
+    def stats(self) -> Dict[str, int]:
+        stats = self._sessions.stats()
+        return {
+            "sessions": stats["entries"],
+            "max_sessions": self.max_sessions,
+            "evicted": stats["evicted"],
+            "expired": stats["expired"],
+        }
@@ -0,0 +1,60 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from models.schemas import first_value
+
+
+def make_key(intent: str, parameters: Dict[str, Any]) -> Hashable:
+    """
+    Key identifying requests that produce the same answer
+
+    Parameters are reduced exactly the way the typed intent parameters read
+    them (first list value, empty dropped) and nothing more: the processors
+    match and echo the values as given, so requests differing in case or
+    spacing may get different answers and must not share one.
+    """
+    normalized = []
+    for name, value in parameters.items():
+        value = first_value(value)
+        if value is not None:
+            normalized.append((name, value))
+    return intent, tuple(sorted(normalized))
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one execution
+
+    The first caller starts the computation as a task; callers arriving while
+    it is in flight await the same task instead of starting their own. The
+    task is shielded, so a disconnecting caller does not cancel it for the rest.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
@@ -0,0 +1,216 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from utils.singleflight import make_key
+
+TRAFFIC_DIR = './data/traffic'
+FILE_PATTERN = "webhook-*.jsonl"
+
+logger = logging.getLogger(__name__)
+
+# Recording and startup warmup are opt-in (see main.py)
+RECORD_DIR_ENV = "TRAFFIC_RECORD_DIR"
+SAMPLE_RATE_ENV = "TRAFFIC_SAMPLE_RATE"
+WARMUP_DIR_ENV = "WARMUP_TRAFFIC_DIR"
+WARMUP_QUERIES_ENV = "WARMUP_QUERIES"
+REDACT_ENV = "TRAFFIC_REDACT"
+
+# Dotted payload paths kept out of recordings. The session id is replaced by a
+# pseudonym instead, so replayed conversations stay apart; the free text a
+# user typed (queryText) and the raw platform request are dropped
+DEFAULT_REDACT = ("session", "queryResult.queryText", "originalDetectIntentRequest")
+PSEUDONYMIZED = ("session",)
+
+
+def redact(payload: Dict[str, Any], paths: Sequence[str], salt: bytes) -> Dict[str, Any]:
+    """Remove the dotted `paths` from a payload in place, pseudonymizing the ones in PSEUDONYMIZED"""
+    for path in paths:
+        *parents, field = path.split(".")
+        node = payload
+        for parent in parents:
+            node = node.get(parent) if isinstance(node, dict) else None
+        if not isinstance(node, dict) or field not in node:
+            continue
+        if path in PSEUDONYMIZED and isinstance(node[field], str):
+            digest = hashlib.sha256(salt + node[field].encode()).hexdigest()[:16]
+            node[field] = f"redacted-{digest}"
+        else:
+            del node[field]
+    return payload
+
+
+class TrafficRecorder:
+    """
+    Write sampled webhook payloads to rotating JSONL files
+
+    `record` only enqueues the raw body; parsing and file I/O happen on a
+    background thread. When the queue is full the payload is dropped rather
+    than making the request wait. A file is rotated once it reaches
+    `max_bytes`, and only the newest `max_files` are kept. The `redact` paths
+    are removed before a payload is written (see DEFAULT_REDACT); session
+    pseudonyms use a salt that lives only as long as the recorder. Write
+    errors (a full disk, permissions) are logged and counted, and the writer
+    carries on with a new file.
+    """
+
+    def __init__(self, directory: str = TRAFFIC_DIR, sample_rate: float = 0.05,
+                 max_bytes: int = 50 * 1024 * 1024, max_files: int = 10, queue_size: int = 10000,
+                 redact: Sequence[str] = DEFAULT_REDACT):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.redact = tuple(redact)
+        self._salt = secrets.token_bytes(16)
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.recorded = 0
+        self.dropped = 0
+        self.errors = 0
+        self._stopping = threading.Event()
+        self._queue: "queue.Queue[Tuple[float, bytes]]" = queue.Queue(maxsize=queue_size)
+        self._file = None
+        self._sequence = 0
+        os.makedirs(directory, exist_ok=True)
+        self._writer = threading.Thread(target=self._write_loop, name="traffic-recorder", daemon=True)
+        self._writer.start()
+
+    def sampled(self) -> bool:
+        return random.random() < self.sample_rate
+
+    def record(self, body: bytes, received_at: Optional[float] = None):
+        try:
+            self._queue.put_nowait((time.time() if received_at is None else received_at, body))
+        except queue.Full:
+            self.dropped += 1
+
+    def _open_next(self):
+        if self._file is not None:
+            self._file.close()
+        self._sequence += 1
+        name = f"webhook-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._sequence:04d}.jsonl"
+        self._file = open(os.path.join(self.directory, name), "a", encoding="utf-8")
+
+        # File names sort by creation time; drop the oldest beyond max_files
+        for path in sorted(glob.glob(os.path.join(self.directory, FILE_PATTERN)))[:-self.max_files]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Another worker recording into the same directory removed it first
+                pass
+
+    def _write(self, received_at: float, body: bytes):
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return
+        if isinstance(payload, dict):
+            redact(payload, self.redact, self._salt)
+        try:
+            if self._file is None or self._file.tell() >= self.max_bytes:
+                self._open_next()
+            self._file.write(json.dumps({"ts": round(received_at, 3), "payload": payload}) + "\n")
+            if self._queue.empty():
+                self._file.flush()
+        except OSError as e:
+            self.errors += 1
+            logger.warning("Traffic recorder could not write to %s: %s", self.directory, e)
+            self._close_file()
+            return
+        self.recorded += 1
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def _write_loop(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    break
+                continue
+            self._write(*item)
+        self._close_file()
+
+    def close(self, timeout: float = 5.0):
+        """Write out everything queued so far and stop the writer thread, waiting at most `timeout` seconds"""
+        self._stopping.set()
+        self._writer.join(timeout)
+        if self._writer.is_alive():
+            logger.warning("Traffic recorder did not finish writing within %.1fs", timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"recorded": self.recorded, "dropped": self.dropped, "errors": self.errors,
+                "queued": self._queue.qsize()}
+
+
+class TrafficRecorderMiddleware:
+    """ASGI middleware handing a sample of POST /webhook bodies to a TrafficRecorder"""
+
+    def __init__(self, app, recorder: TrafficRecorder, path: str = "/webhook"):
+        self.app = app
+        self.recorder = recorder
+        self.path = path
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != self.path
+                or not self.recorder.sampled()):
+            return await self.app(scope, receive, send)
+
+        received_at = time.time()
+        chunks = []
+
+        async def receive_and_copy():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    self.recorder.record(b"".join(chunks), received_at)
+            return message
+
+        await self.app(scope, receive_and_copy, send)
+
+
+def load_recorded(path: str = TRAFFIC_DIR) -> List[Tuple[float, Dict[str, Any]]]:
+    """(timestamp, payload) pairs from a recording file or directory, oldest first"""
+    paths = sorted(glob.glob(os.path.join(path, FILE_PATTERN))) if os.path.isdir(path) else [path]
+    records = []
+    for file_path in paths:
+        with open(file_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A file being written can end with a partial line
+                    continue
+                records.append((entry["ts"], entry["payload"]))
+    records.sort(key=lambda record: record[0])
+    return records
+
+
+def hottest_payloads(records: List[Tuple[float, Dict[str, Any]]], top: int = 50) -> List[Dict[str, Any]]:
+    """One payload per distinct query, most frequent first"""
+    counts = Counter()
+    examples = {}
+    for _, payload in records:
+        try:
+            query = payload["queryResult"]
+            key = make_key(query["intent"]["displayName"], query.get("parameters") or {})
+        except (KeyError, TypeError):
+            continue
+        counts[key] += 1
+        examples.setdefault(key, payload)
+    return [examples[key] for key, _ in counts.most_common(top)]
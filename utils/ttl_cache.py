@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Thread-safe mapping bounded by size and age
+
+    Entries expire `ttl_seconds` after they were stored or, with `sliding`,
+    after they were last read. Beyond `max_entries` the oldest entry (least
+    recently used with `sliding`) is evicted. Entries stay ordered by expiry,
+    so expired ones are always at the front and purging stops at the first
+    live entry.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, sliding: bool = False):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.sliding = sliding
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.expired = 0
+
+    def _purge_expired(self, now: float):
+        while self._entries:
+            key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[key]
+            self.expired += 1
+
+    def _get(self, key: Hashable, now: float) -> Optional[Any]:
+        self._purge_expired(now)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.sliding:
+            self._entries[key] = (now + self.ttl_seconds, entry[1])
+            self._entries.move_to_end(key)
+        return entry[1]
+
+    def _put(self, key: Hashable, value: Any, now: float):
+        self._entries.pop(key, None)
+        while len(self._entries) >= self.max_entries:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+        self._entries[key] = (now + self.ttl_seconds, value)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """The live value stored under `key`, or None"""
+        with self._lock:
+            return self._get(key, time.monotonic())
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            now = time.monotonic()
+            self._purge_expired(now)
+            self._put(key, value, now)
+
+    def update(self, key: Hashable, merge: Callable[[Optional[Any]], Any]) -> Any:
+        """Store `merge(current value or None)` under `key` in one step and return it"""
+        with self._lock:
+            now = time.monotonic()
+            value = merge(self._get(key, now))
+            self._put(key, value, now)
+            return value
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries,
+                    "evicted": self.evicted, "expired": self.expired}